@@ -1,17 +1,34 @@
 import os
+import io
+import json
 import wave
 import math
+import mmap
+import time
 import array
+import struct
+import hashlib
+import zipfile
+import argparse
+import threading
+import contextlib
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 
+from cvvcotofixer import create_romaji_to_hiragana_map
+
+# NumPy is optional; the pure Python DSP loops are used when it is missing
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Define paths
 consonant_path = r"this\is\a\PATH"
 vowel_path = r"this\is\a\PATH"
 output_path = r"this\is\a\PATH"
 
-# Ensure output directory exists
-os.makedirs(output_path, exist_ok=True)
-
 # Vowel list
 vowels = ['a', 'e', 'u', 'i', 'o', 'n']
 
@@ -54,10 +71,115 @@ recording_table = [
     "rwa_rwi_rwu_rwe_rwo_ra"
 ]
 
+# Splice and fade settings
+consonant_cut_fraction = 0.55       # Consonant kept before the consonant-vowel crossfade
+consonant_crossfade_fraction = 0.1  # Consonant-vowel crossfade
+syllable_fade_fraction = 0.3        # Cosine fadeout at the end of each syllable
+line_crossfade_fraction = 0.05      # Crossfade between syllables in a line
+
+# Write lines to disk as they are assembled instead of building each line in memory
+streaming_output = True
+
+# Use vectorized NumPy kernels for fades and crossfades when available
+use_numpy = True
+
+# Format normalization (--normalize): other sample widths, float, stereo and other rates are
+# converted to mono 44100Hz 16-bit and cached on disk by source hash and conversion parameters
+normalize_sources = False
+normalized_cache_dir = None
+normalize_target_rate = 44100
+normalize_version = 2
+resample_padding = 8192         # Silent output samples appended before resampling, trimmed afterwards
+
+# Energy/onset analysis (--analyze, needs NumPy): sources are spliced from their detected onset to
+# their release, and oto.ini consonant values follow the vowel's steady state
+splice_analysis = False
+analysis_frame_ms = 5           # Analysis frame length
+analysis_silence_db = 40.0      # Frames this far below the loudest frame are silence...
+analysis_zcr_threshold = 0.3    # ...unless noisy (fricatives), which count down to 12 dB lower
+analysis_steady_db = 6.0        # Steady state: frames within this of the loudest frame
+_asset_analyses = {}
+
+# Decoded asset cache ((path, normalize settings) -> signature, audio data, parameters, format error)
+asset_cache_max_entries = 128
+_asset_cache = OrderedDict()
+_asset_cache_stats = {'hits': 0, 'misses': 0}
+# Guards the decoded asset, analysis and format check caches, which prefetch threads fill too
+_asset_cache_lock = threading.Lock()
+
+# Packed asset store: every source decoded once into one memory-mapped int16 file (--asset-store).
+# Each build writes a new data file named in the index, so a file that is still mapped is never replaced
+cache_dirname = ".ajpncvvc_cache"
+asset_store_data_prefix = "asset_store_"
+asset_store_index_filename = "asset_store.json"
+_asset_store = None
+
+# Audio parameters restored from the asset store index (same fields as wave's getparams())
+AudioParams = namedtuple('AudioParams', 'nchannels sampwidth framerate nframes comptype compname')
+
+# Rendered syllable cache (syllable, source signatures, DSP settings -> faded audio, parameters)
+syllable_cache_max_bytes = 64 * 1024 * 1024
+_syllable_cache = OrderedDict()
+_syllable_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+# oto.ini generated from the known splice points (written with --oto)
+oto_filename = "oto.ini"
+oto_encoding = 'utf-8'
+_romaji_to_hiragana = create_romaji_to_hiragana_map()
+
+# Per-stage profiling (enabled with --profile): wall time and sample counts per line and syllable
+profiling_enabled = False
+_line_profiles = []
+_line_profile = None
+_syllable_profile = None
+
+# Pipelined I/O (--pipeline): sources of upcoming lines are decoded on prefetch threads and
+# finished files are written by writer threads while the next lines render
+pipeline_io = False
+prefetch_threads = 4
+writer_threads = 4
+pipeline_depth = 8              # Lines decoded ahead, and finished files waiting to be written, at most
+
+# Source folder indexes (folder or zip archive -> {normalized file name: path}), scanned once per run
+_asset_indexes = {}
+
+# Header checks of planned sources ((path, normalize_sources) -> signature, format error)
+_format_checks = {}
+
+# Zip archives used as source folders (archive path -> ZipFile) and their members (path -> archive, member)
+_open_archives = {}
+_archive_members = {}
+
+# Renderer objects apply their settings to this module, so calls are serialized
+_renderer_lock = threading.RLock()
+
+# Per-thread state: captured console messages (see capture_console) and prefetch threads
+_thread_state = threading.local()
+_console_lock = threading.Lock()
+
+# Zip voicebank packaging (--package): fixed entry timestamp and the checksum list written last
+package_entry_date = (1980, 1, 1, 0, 0, 0)
+package_checksum_filename = "checksums.sha256"
+package_error_report_filename = "error_report.txt"
+
+# Build manifest written next to the outputs for incremental rebuilds
+manifest_filename = "build_manifest.json"
+manifest_version = 2
+_file_hash_cache = {}
+
+def open_asset(file_path):
+    """Open a source file or zip archive member for binary reading"""
+    member = _archive_members.get(file_path)
+    if member is not None:
+        archive_path, member_name = member
+        # Members are small; decode them from memory
+        return io.BytesIO(_open_archives[archive_path].read(member_name))
+    return open(file_path, 'rb')
+
 def read_wav(file_path):
     """Read WAV file, return audio data and parameters"""
     try:
-        with wave.open(file_path, 'rb') as wav_file:
+        with open_asset(file_path) as f, wave.open(f, 'rb') as wav_file:
             params = wav_file.getparams()
             frames = wav_file.readframes(params.nframes)
             # Convert byte data to array
@@ -80,6 +202,478 @@ def write_wav(file_path, audio_data, params):
     except Exception as e:
         raise Exception(f"Cannot write file {file_path}: {str(e)}")
 
+def read_wav_params(file_path):
+    """Read only the header of a WAV file, return its parameters"""
+    with open_asset(file_path) as f, wave.open(f, 'rb') as wav_file:
+        return wav_file.getparams()
+
+def check_audio_format(params):
+    """Return an error message if audio is not mono 44100Hz 16-bit, otherwise None"""
+    if params.sampwidth != 2:
+        return "Audio is not 16-bit format"
+    if params.nchannels != 1:
+        return "Audio is not mono"
+    if params.framerate != 44100:
+        return "Audio sample rate is not 44100Hz"
+    return None
+
+def parse_wav(data):
+    """Parse RIFF/WAVE bytes, return (format tag, channels, sample rate, bits per sample, sample bytes)
+    
+    Unlike the wave module this accepts IEEE float and WAVE_FORMAT_EXTENSIBLE
+    files; the format tag of an extensible file is taken from its subformat.
+    """
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+    fmt = None
+    samples = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = struct.unpack_from('<I', data, pos + 4)[0]
+        body = data[pos + 8:pos + 8 + size]
+        if chunk_id == b'fmt ':
+            tag, channels, rate, _, _, bits = struct.unpack_from('<HHIIHH', body)
+            if tag == 0xFFFE and len(body) >= 26:
+                tag = struct.unpack_from('<H', body, 24)[0]
+            fmt = (tag, channels, rate, bits)
+        elif chunk_id == b'data':
+            samples = body
+        # Chunks are padded to an even size
+        pos += 8 + size + (size & 1)
+    if fmt is None or samples is None:
+        raise ValueError("Missing fmt or data chunk")
+    if fmt[0] not in (1, 3) or (fmt[0] == 1 and fmt[3] not in (8, 16, 24, 32)) or (fmt[0] == 3 and fmt[3] not in (32, 64)):
+        raise ValueError(f"Unsupported WAV format (format tag {fmt[0]}, {fmt[3]}-bit)")
+    if fmt[1] < 1 or fmt[2] < 1:
+        raise ValueError("Invalid channel count or sample rate")
+    return fmt + (samples,)
+
+def _decode_samples(tag, channels, bits, data):
+    """Decode PCM or float sample bytes to a float64 mono array in [-1, 1)"""
+    frame_bytes = channels * bits // 8
+    data = data[:len(data) - len(data) % frame_bytes]
+    if tag == 3:
+        samples = np.frombuffer(data, dtype='<f4' if bits == 32 else '<f8').astype(np.float64)
+    elif bits == 8:
+        # 8-bit WAV is unsigned
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float64) - 128) / 128
+    elif bits == 24:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(values >= 1 << 23, values - (1 << 24), values) / float(1 << 23)
+    else:
+        samples = np.frombuffer(data, dtype='<i2' if bits == 16 else '<i4') / float(1 << (bits - 1))
+    return samples.reshape(-1, channels).mean(axis=1)
+
+def _resample(samples, rate, target_rate):
+    """Band-limited resampling by truncating or zero-padding the spectrum"""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    length = max(1, int(round(len(samples) * target_rate / rate)))
+    # The FFT treats the clip as periodic; silence after it keeps a loud end from ringing into its start
+    # Padding to a whole number of rate steps keeps the resampled length exact
+    step = rate // math.gcd(rate, target_rate)
+    padded_size = -(-(len(samples) + resample_padding * rate // target_rate) // step) * step
+    padded = np.concatenate((samples, np.zeros(padded_size - len(samples))))
+    padded_length = padded_size * target_rate // rate
+    spectrum = np.fft.rfft(padded)
+    resized = np.zeros(padded_length // 2 + 1, dtype=spectrum.dtype)
+    keep = min(len(spectrum), len(resized))
+    resized[:keep] = spectrum[:keep]
+    return np.fft.irfft(resized, padded_length)[:length] * (padded_length / len(padded))
+
+def normalize_audio(data):
+    """Convert WAV bytes of any supported format to mono 44100Hz 16-bit, return audio data and parameters"""
+    tag, channels, rate, bits, sample_bytes = parse_wav(data)
+    samples = _resample(_decode_samples(tag, channels, bits, sample_bytes), rate, normalize_target_rate)
+    samples = np.clip(np.round(samples * 32768), -32768, 32767)
+    audio_data = _to_array(samples)
+    return audio_data, AudioParams(1, 2, normalize_target_rate, len(audio_data), 'NONE', 'not compressed')
+
+def normalized_cache_file(file_path):
+    """Return the normalized cache file for the current contents of a source"""
+    key = f"{file_sha256(file_path)}-{normalize_target_rate}-mono-16-v{normalize_version}"
+    return os.path.join(normalized_cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.wav')
+
+def normalize_settings():
+    """Return the normalization settings, or None if sources are read as they are"""
+    if not normalize_sources or np is None:
+        return None
+    return (normalize_target_rate, normalize_version)
+
+def needs_normalization(file_path):
+    """Return True if a source is not already readable as mono 44100Hz 16-bit"""
+    try:
+        return check_audio_format(read_wav_params(file_path)) is not None
+    except Exception:
+        # The wave module rejects float and extensible files
+        return True
+
+def normalization_error(file_path):
+    """Return why a source cannot be normalized, or None if it can"""
+    if np is None:
+        return "Format normalization requires NumPy"
+    try:
+        with open_asset(file_path) as f:
+            parse_wav(f.read())
+    except Exception as e:
+        return f"Cannot normalize file: {str(e)}"
+    return None
+
+def read_normalized_wav(file_path):
+    """Return a source as mono 44100Hz 16-bit audio, converting it once into the normalized cache"""
+    cache_file = normalized_cache_file(file_path) if normalized_cache_dir is not None else None
+    if cache_file is not None and os.path.exists(cache_file):
+        return read_wav(cache_file)
+    try:
+        with open_asset(file_path) as f:
+            audio_data, params = normalize_audio(f.read())
+    except Exception as e:
+        raise Exception(f"Cannot normalize file {file_path}: {str(e)}")
+    if cache_file is not None:
+        os.makedirs(normalized_cache_dir, exist_ok=True)
+        # Write under a temporary name so concurrent workers never read a partial file
+        temp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write_wav(temp_file, audio_data, params)
+        os.replace(temp_file, cache_file)
+    return audio_data, params
+
+def decode_asset(file_path):
+    """Read a source WAV, normalizing its format first when enabled and needed"""
+    if normalize_sources and np is not None and needs_normalization(file_path):
+        return read_normalized_wav(file_path)
+    return read_wav(file_path)
+
+def asset_signature(file_path):
+    """Return (modification time, size) identifying the current contents of a file
+    
+    Zip archive members use the archive's modification time and the member's
+    CRC and size.
+    """
+    member = _archive_members.get(file_path)
+    if member is not None:
+        archive_path, member_name = member
+        info = _open_archives[archive_path].getinfo(member_name)
+        return (os.stat(archive_path).st_mtime_ns, info.CRC, info.file_size)
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_asset(file_path):
+    """Read WAV file through the asset cache, return audio data, parameters and format error"""
+    # The same file decodes differently with and without --normalize
+    key = (os.path.abspath(file_path), normalize_settings())
+    signature = asset_signature(file_path)
+    
+    # Slices of the packed asset store are used without copying
+    if _asset_store is not None and _asset_store['normalize'] == key[1]:
+        stored = _asset_store['index']['sources'].get(key[0])
+        if stored is not None and stored['signature'] == list(signature):
+            params = AudioParams(*stored['params'])
+            samples = _asset_store['samples'][stored['offset']:stored['offset'] + stored['length']]
+            return samples, params, check_audio_format(params)
+    
+    # Prefetch threads share the cache; decoding itself runs outside the lock
+    with _asset_cache_lock:
+        entry = _asset_cache.get(key)
+        if entry is not None and entry[0] == signature:
+            _asset_cache.move_to_end(key)
+            _asset_cache_stats['hits'] += 1
+            return entry[1], entry[2], entry[3]
+        _asset_cache_stats['misses'] += 1
+    
+    # Decode and validate once; the cached array is shared and must not be modified
+    start = time.perf_counter() if profiling_enabled else None
+    audio_data, params = decode_asset(file_path)
+    format_error = check_audio_format(params)
+    if start is not None:
+        record_stage('read', start, len(audio_data))
+    with _asset_cache_lock:
+        _asset_cache[key] = (signature, audio_data, params, format_error)
+        _asset_cache.move_to_end(key)
+        while len(_asset_cache) > asset_cache_max_entries:
+            _asset_cache.popitem(last=False)
+    
+    return audio_data, params, format_error
+
+def console(message, end='\n'):
+    """Print a progress or warning message, or collect it if the current thread captures its messages"""
+    captured = getattr(_thread_state, 'console', None)
+    if captured is None:
+        # Writer threads print too; keep each message on its own line
+        with _console_lock:
+            print(message, end=end, flush=True)
+    else:
+        captured.append(message)
+
+@contextlib.contextmanager
+def capture_console():
+    """Collect the console() messages of the current thread in a list instead of printing them
+    
+    Unlike redirecting sys.stdout this only affects the calling thread, so
+    other threads of a server keep their output.
+    """
+    previous = getattr(_thread_state, 'console', None)
+    messages = []
+    _thread_state.console = messages
+    try:
+        yield messages
+    finally:
+        _thread_state.console = previous
+
+def record_stage(stage, start, samples):
+    """Add the time since start and a sample count to the current line and syllable profiles"""
+    # Prefetched reads belong to no line being rendered
+    if getattr(_thread_state, 'prefetching', False):
+        return
+    elapsed = time.perf_counter() - start
+    for profile in (_line_profile, _syllable_profile):
+        if profile is not None:
+            totals = profile['stages'].setdefault(stage, {'seconds': 0.0, 'samples': 0, 'calls': 0})
+            totals['seconds'] += elapsed
+            totals['samples'] += samples
+            totals['calls'] += 1
+
+def take_line_profiles():
+    """Return and forget the profiles of the lines rendered so far"""
+    profiles = list(_line_profiles)
+    _line_profiles.clear()
+    return profiles
+
+def clear_asset_cache():
+    """Drop all decoded assets and their analyses"""
+    _asset_cache.clear()
+    _asset_analyses.clear()
+
+def asset_cache_stats():
+    """Return hit/miss statistics and current size of the decoded asset cache"""
+    stats = dict(_asset_cache_stats)
+    stats['entries'] = len(_asset_cache)
+    return stats
+
+def build_asset_store(store_dir, source_files):
+    """Decode source files into one contiguous int16 file with an offset/length index
+    
+    The existing store is reused while every source keeps its signature and
+    the normalization settings are unchanged. Returns True if it was reused,
+    False if it was rebuilt.
+    """
+    index_file = os.path.join(store_dir, asset_store_index_filename)
+    sources = {os.path.abspath(f): f for f in source_files}
+    signatures = {key: list(asset_signature(f)) for key, f in sorted(sources.items())}
+    normalize = normalize_settings()
+    normalize = list(normalize) if normalize is not None else None
+    
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        data_file = os.path.join(store_dir, index['data_file'])
+        if (index['signatures'] == signatures and index['normalize'] == normalize
+                and os.path.getsize(data_file) == 2 * index['samples']):
+            return True
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    os.makedirs(store_dir, exist_ok=True)
+    data_filename = f"{asset_store_data_prefix}{time.time_ns()}_{os.getpid()}.bin"
+    entries = {}
+    offset = 0
+    with open(os.path.join(store_dir, data_filename), 'wb') as f:
+        for key, signature in signatures.items():
+            try:
+                audio_data, params = decode_asset(sources[key])
+            except Exception:
+                # Unreadable sources stay out of the store and are reported when loaded
+                continue
+            f.write(audio_data.tobytes())
+            entries[key] = {'signature': signature, 'offset': offset, 'length': len(audio_data),
+                            'params': list(params)}
+            offset += len(audio_data)
+    
+    # Switching the index makes the new data file current
+    index = {'data_file': data_filename, 'signatures': signatures, 'normalize': normalize, 'samples': offset,
+             'sources': entries}
+    with open(index_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    close_asset_store()
+    os.replace(index_file + '.tmp', index_file)
+    
+    # Older data files go once nothing maps them (on Windows a mapped file cannot be removed yet)
+    for name in os.listdir(store_dir):
+        if name.startswith(asset_store_data_prefix) and name.endswith('.bin') and name != data_filename:
+            try:
+                os.remove(os.path.join(store_dir, name))
+            except OSError:
+                pass
+    return False
+
+def open_asset_store(store_dir):
+    """Memory-map a packed asset store so load_asset serves its sources without decoding"""
+    global _asset_store
+    close_asset_store()
+    with open(os.path.join(store_dir, asset_store_index_filename), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index['samples'] == 0:
+        return
+    with open(os.path.join(store_dir, index['data_file']), 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    normalize = index.get('normalize')
+    _asset_store = {'dir': store_dir, 'index': index, 'mapping': mapping,
+                    'samples': memoryview(mapping).cast('h'),
+                    'normalize': tuple(normalize) if normalize is not None else None}
+
+def close_asset_store():
+    """Stop serving sources from the packed asset store and unmap it
+    
+    Sample slices returned by load_asset are only valid until then. The
+    caches keep copies (rendered syllables, analyses), never store slices.
+    A slice a caller still holds keeps its part of the file mapped until it
+    is released; the next build writes a new data file instead of replacing
+    this one.
+    """
+    global _asset_store
+    if _asset_store is None:
+        return
+    store = _asset_store
+    _asset_store = None
+    try:
+        store['samples'].release()
+        store['mapping'].close()
+    except BufferError:
+        pass
+
+def numpy_enabled():
+    """Return True if the vectorized NumPy kernels should be used"""
+    return use_numpy and np is not None
+
+def _as_samples(audio_data):
+    """View int16 audio data as a NumPy array without copying"""
+    return np.frombuffer(audio_data, dtype=np.int16)
+
+def _to_array(samples):
+    """Convert a NumPy sample array back to array('h')"""
+    result = array.array('h')
+    result.frombytes(samples.astype(np.int16, copy=False).tobytes())
+    return result
+
+def _saturate(samples):
+    """Truncate float samples toward zero and clamp them to int16 in one pass"""
+    return np.clip(np.trunc(samples), -32768, 32767).astype(np.int16)
+
+def _fadeout_numpy(samples, fade_samples):
+    """Vectorized cosine fadeout over the last fade_samples of samples"""
+    phase = np.arange(fade_samples, dtype=np.float32) * np.float32((math.pi / 2) / fade_samples)
+    result = samples.copy()
+    tail = samples[-fade_samples:].astype(np.float32) * np.cos(phase)
+    result[-fade_samples:] = _saturate(tail)
+    return result
+
+def _crossfade_mix_numpy(tail, head):
+    """Mix equal-length tail (fading out) and head (fading in) with cosine/sine windows"""
+    crossfade_length = len(tail)
+    phase = np.arange(crossfade_length, dtype=np.float32) * np.float32((math.pi / 2) / crossfade_length)
+    return _saturate(tail.astype(np.float32) * np.cos(phase) + head.astype(np.float32) * np.sin(phase))
+
+def _crossfade_numpy(samples1, samples2, crossfade_length):
+    """Vectorized cosine crossfade, crossfade_length must not exceed either segment"""
+    mixed = _crossfade_mix_numpy(samples1[len(samples1) - crossfade_length:], samples2[:crossfade_length])
+    return np.concatenate((samples1[:len(samples1) - crossfade_length],
+                           mixed,
+                           samples2[crossfade_length:]))
+
+def crossfade_length_for(len1, len2, crossfade_fraction):
+    """Return the crossfade length cosine_crossfade_segments uses for two segment lengths"""
+    # Use the smaller crossfade length, at least 10 samples
+    crossfade_length = min(int(len1 * crossfade_fraction), int(len2 * crossfade_fraction))
+    crossfade_length = max(10, crossfade_length)
+    
+    # If crossfade length is too large, reduce it
+    if crossfade_length > len1 or crossfade_length > len2:
+        crossfade_length = min(len1, len2) // 2
+        crossfade_length = max(10, crossfade_length)
+    
+    # Segments shorter than 10 samples are crossfaded over their whole length
+    return min(crossfade_length, len1, len2)
+
+def is_archive(path):
+    """Return True if a source path is a zip archive instead of a folder"""
+    return os.path.isfile(path) and zipfile.is_zipfile(path)
+
+def build_archive_index(archive_path):
+    """Index the WAV members of a zip archive by file name without extracting them"""
+    archive = _open_archives.pop(archive_path, None)
+    if archive is not None:
+        archive.close()
+    archive = zipfile.ZipFile(archive_path)
+    _open_archives[archive_path] = archive
+    
+    index = {}
+    for info in archive.infolist():
+        member_name = info.filename
+        file_name = member_name.rsplit('/', 1)[-1]
+        if info.is_dir() or member_name.startswith('__MACOSX/') or not file_name.lower().endswith('.wav'):
+            continue
+        key = os.path.normcase(file_name)
+        if key not in index:
+            member_path = os.path.join(archive_path, *member_name.split('/'))
+            _archive_members[member_path] = (archive_path, member_name)
+            index[key] = member_path
+    return index
+
+def build_asset_index(directory):
+    """Scan a source folder or zip archive once, return {normalized file name: path} for its WAV files"""
+    if is_archive(directory):
+        index = build_archive_index(directory)
+        _asset_indexes[directory] = index
+        return index
+    
+    index = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith('.wav') and entry.is_file():
+                    index[os.path.normcase(entry.name)] = entry.path
+    except OSError:
+        # A missing folder is reported as missing files
+        pass
+    _asset_indexes[directory] = index
+    return index
+
+def find_asset(directory, file_name):
+    """Look up a file in a source folder's index, return its path or None if missing"""
+    index = _asset_indexes.get(directory)
+    if index is None:
+        index = build_asset_index(directory)
+    return index.get(os.path.normcase(file_name))
+
+def crossfade_output_length(len1, len2, crossfade_fraction):
+    """Return the length cosine_crossfade_segments produces for two segment lengths"""
+    if len1 == 0:
+        return len2
+    if len2 == 0:
+        return len1
+    
+    crossfade_length = crossfade_length_for(len1, len2, crossfade_fraction)
+    prefix_length = len1 - crossfade_length if len1 > crossfade_length else 0
+    suffix_length = len2 - crossfade_length if crossfade_length < len2 else 0
+    return prefix_length + min(crossfade_length, len2) + suffix_length
+
+def mix_crossfade(tail, head):
+    """Mix equal-length tail (fading out) and head (fading in) with cosine/sine windows"""
+    crossfade_length = len(tail)
+    if crossfade_length == 0:
+        return array.array('h')
+    if numpy_enabled():
+        return _to_array(_crossfade_mix_numpy(_as_samples(tail), _as_samples(head)))
+    
+    result = array.array('h', bytes(2 * crossfade_length))
+    for i in range(crossfade_length):
+        factor1 = math.cos((i / crossfade_length) * (math.pi / 2))
+        factor2 = math.sin((i / crossfade_length) * (math.pi / 2))
+        sample = int(tail[i] * factor1 + head[i] * factor2)
+        result[i] = max(-32768, min(32767, sample))
+    return result
+
 def apply_cosine_fadeout(audio_data, fade_fraction=0.3):
     """Apply cosine fadeout to the last fade_fraction of audio data"""
     if len(audio_data) == 0:
@@ -89,6 +683,9 @@ def apply_cosine_fadeout(audio_data, fade_fraction=0.3):
     if fade_samples == 0:
         fade_samples = 1
     
+    if numpy_enabled() and fade_samples <= len(audio_data):
+        return _to_array(_fadeout_numpy(_as_samples(audio_data), fade_samples))
+    
     result = array.array('h', audio_data)
     
     # Apply cosine fadeout to the last fade_fraction of audio
@@ -111,20 +708,11 @@ def cosine_crossfade_segments(audio1, audio2, crossfade_fraction=0.05):
     if len(audio2) == 0:
         return audio1
     
-    # Calculate crossfade length (5% of each segment)
-    crossfade_len1 = int(len(audio1) * crossfade_fraction)
-    crossfade_len2 = int(len(audio2) * crossfade_fraction)
-    
-    # Use the smaller crossfade length
-    crossfade_length = min(crossfade_len1, crossfade_len2)
+    # Calculate crossfade length (crossfade_fraction of the shorter segment)
+    crossfade_length = crossfade_length_for(len(audio1), len(audio2), crossfade_fraction)
     
-    # Ensure minimum crossfade length
-    crossfade_length = max(10, crossfade_length)
-    
-    # If crossfade length is too large, reduce it
-    if crossfade_length > len(audio1) or crossfade_length > len(audio2):
-        crossfade_length = min(len(audio1), len(audio2)) // 2
-        crossfade_length = max(10, crossfade_length)
+    if numpy_enabled() and crossfade_length <= min(len(audio1), len(audio2)):
+        return _to_array(_crossfade_numpy(_as_samples(audio1), _as_samples(audio2), crossfade_length))
     
     result = array.array('h')
     
@@ -145,7 +733,7 @@ def cosine_crossfade_segments(audio1, audio2, crossfade_fraction=0.05):
             sample1 = audio1[len(audio1) - crossfade_length + i] if (len(audio1) - crossfade_length + i) < len(audio1) else 0
             sample2 = audio2[i] if i < len(audio2) else 0
             sample = int(sample1 * factor1 + sample2 * factor2)
-            result.append(sample)
+            result.append(max(-32768, min(32767, sample)))
     
     # Add remaining part of second segment
     if crossfade_length < len(audio2):
@@ -156,7 +744,7 @@ def cosine_crossfade_segments(audio1, audio2, crossfade_fraction=0.05):
 def concatenate_audio(consonant_data, vowel_data, params):
     """Concatenate consonant and vowel audio"""
     # Calculate 55% position of consonant
-    consonant_cut_pos = int(len(consonant_data) * 0.55)
+    consonant_cut_pos = int(len(consonant_data) * consonant_cut_fraction)
     
     # Extract first 55% of consonant
     consonant_part = consonant_data[:consonant_cut_pos]
@@ -166,8 +754,19 @@ def concatenate_audio(consonant_data, vowel_data, params):
     fade_length = max(10, fade_length)  # Ensure at least 10 samples
     
     # Crossfade between remaining consonant and vowel
+    if numpy_enabled():
+        consonant_samples = _as_samples(consonant_data)
+        vowel_samples = _as_samples(vowel_data)
+        consonant_remainder = consonant_samples[consonant_cut_pos:]
+        crossfade_length = crossfade_length_for(len(consonant_remainder), len(vowel_samples),
+                                                consonant_crossfade_fraction)
+        if (len(consonant_remainder) > 0 and len(vowel_samples) > 0
+                and crossfade_length <= min(len(consonant_remainder), len(vowel_samples))):
+            faded_part = _crossfade_numpy(consonant_remainder, vowel_samples, crossfade_length)
+            return _to_array(np.concatenate((consonant_samples[:consonant_cut_pos], faded_part)))
+    
     consonant_remainder = consonant_data[consonant_cut_pos:]
-    faded_part = cosine_crossfade_segments(consonant_remainder, vowel_data, 0.1)  # Use 10% for consonant-vowel crossfade
+    faded_part = cosine_crossfade_segments(consonant_remainder, vowel_data, consonant_crossfade_fraction)  # Use 10% for consonant-vowel crossfade
     
     # Concatenate audio
     result = array.array('h')
@@ -176,138 +775,985 @@ def concatenate_audio(consonant_data, vowel_data, params):
     
     return result
 
+def plan_line_layout(segment_lengths, crossfade_fraction=0.05):
+    """Compute offsets and crossfade lengths for joining segments in sequence
+    
+    Crossfade lengths are based on the accumulated length so far, matching
+    repeated cosine_crossfade_segments calls. Returns (offsets, crossfade
+    lengths, total length), or None if a segment is too short to lay out.
+    """
+    if not segment_lengths or min(segment_lengths) == 0:
+        return None
+    
+    offsets = [0]
+    crossfades = [0]
+    total_length = segment_lengths[0]
+    
+    for length in segment_lengths[1:]:
+        crossfade_length = crossfade_length_for(total_length, length, crossfade_fraction)
+        if crossfade_length > total_length or crossfade_length > length:
+            return None
+        offsets.append(total_length - crossfade_length)
+        crossfades.append(crossfade_length)
+        total_length = total_length - crossfade_length + length
+    
+    return offsets, crossfades, total_length
+
+def assemble_line(segments, crossfade_fraction=0.05):
+    """Join segments with cosine crossfades into a single preallocated buffer"""
+    layout = plan_line_layout([len(segment) for segment in segments], crossfade_fraction)
+    if layout is None:
+        # Degenerate segments: fall back to pairwise crossfades
+        combined_audio = segments[0] if segments else array.array('h')
+        for i in range(1, len(segments)):
+            combined_audio = cosine_crossfade_segments(combined_audio, segments[i], crossfade_fraction)
+        return combined_audio
+    
+    offsets, crossfades, total_length = layout
+    
+    if numpy_enabled():
+        result = np.empty(total_length, dtype=np.int16)
+        for segment, offset, crossfade_length in zip(segments, offsets, crossfades):
+            samples = _as_samples(segment)
+            if crossfade_length:
+                window = slice(offset, offset + crossfade_length)
+                result[window] = _crossfade_mix_numpy(result[window], samples[:crossfade_length])
+            result[offset + crossfade_length:offset + len(samples)] = samples[crossfade_length:]
+        return _to_array(result)
+    
+    result = array.array('h', bytes(2 * total_length))
+    for segment, offset, crossfade_length in zip(segments, offsets, crossfades):
+        # Mix the crossfade window in place
+        for i in range(crossfade_length):
+            factor1 = math.cos((i / crossfade_length) * (math.pi / 2))
+            factor2 = math.sin((i / crossfade_length) * (math.pi / 2))
+            sample = int(result[offset + i] * factor1 + segment[i] * factor2)
+            result[offset + i] = max(-32768, min(32767, sample))
+        result[offset + crossfade_length:offset + len(segment)] = segment[crossfade_length:]
+    
+    return result
+
+def analysis_settings():
+    """Return the analysis settings, or None if splices use the whole sources"""
+    if not splice_analysis or np is None:
+        return None
+    return (analysis_frame_ms, analysis_silence_db, analysis_zcr_threshold, analysis_steady_db)
+
+def frame_features(samples, frame_length):
+    """Return frame-wise RMS energy and zero-crossing rate of int16 samples, computed in one vectorized pass"""
+    frame_count = len(samples) // frame_length
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_length - 1)
+    return rms, zcr
+
+def analyze_audio(audio_data, framerate):
+    """Find where a source's sound starts and ends and where it is at full level
+    
+    Returns sample positions {'onset', 'steady', 'steady_end', 'release'}:
+    the first and last sounding frames, and the first and last frames within
+    analysis_steady_db of the loudest one. Quiet frames count as sound when
+    their zero-crossing rate marks them as noise, so weak fricatives are kept.
+    """
+    samples = _as_samples(audio_data)
+    frame_length = max(2, int(framerate * analysis_frame_ms / 1000))
+    rms, zcr = frame_features(samples, frame_length)
+    if len(rms) == 0 or rms.max() == 0:
+        return {'onset': 0, 'steady': 0, 'steady_end': len(samples), 'release': len(samples)}
+    
+    peak = rms.max()
+    threshold = peak * 10 ** (-analysis_silence_db / 20)
+    sounding = np.flatnonzero((rms >= threshold) | ((zcr >= analysis_zcr_threshold) & (rms >= threshold / 4)))
+    steady = np.flatnonzero(rms >= peak * 10 ** (-analysis_steady_db / 20))
+    
+    def position(frame):
+        # The partial frame at the end belongs to the last full frame
+        return len(samples) if frame >= len(rms) else int(frame) * frame_length
+    return {
+        'onset': position(sounding[0]),
+        'steady': position(steady[0]),
+        'steady_end': position(steady[-1] + 1),
+        'release': position(sounding[-1] + 1),
+    }
+
+def analyze_asset(file_path):
+    """Return the analysis of a source (see analyze_audio), computed once per version of the file"""
+    key = os.path.abspath(file_path)
+    signature = asset_signature(file_path)
+    settings = (analysis_settings(), normalize_settings())
+    cached = _asset_analyses.get(key)
+    if cached is not None and cached[0] == signature and cached[1] == settings:
+        return cached[2]
+    
+    audio_data, params, _ = load_asset(file_path)
+    start = time.perf_counter() if profiling_enabled else None
+    analysis = analyze_audio(audio_data, params.framerate)
+    if start is not None:
+        record_stage('analysis', start, len(audio_data))
+    with _asset_cache_lock:
+        _asset_analyses[key] = (signature, settings, analysis)
+    return analysis
+
+def load_source(file_path):
+    """Load a source for splicing: the whole file, or with --analyze the part from its onset to its release"""
+    audio_data, params, format_error = load_asset(file_path)
+    if format_error or analysis_settings() is None:
+        return audio_data, params, format_error
+    analysis = analyze_asset(file_path)
+    return audio_data[analysis['onset']:analysis['release']], params, format_error
+
+def steady_offset(file_path):
+    """Return how far into a spliced source its steady state starts (0 without --analyze)"""
+    if analysis_settings() is None:
+        return 0
+    analysis = analyze_asset(file_path)
+    return analysis['steady'] - analysis['onset']
+
+def analyzed_crossfade_length(consonant_file, consonant_length, vowel_file, vowel_length):
+    """Return the consonant-vowel crossfade length set by --analyze, or None to use the fixed fractions
+    
+    The whole consonant (onset to release) is kept and the vowel's attack,
+    from its onset to its steady state, is laid over the consonant's decay
+    after its steady part, so the vowel is steady where the consonant stops.
+    """
+    if analysis_settings() is None or consonant_length == 0 or vowel_length == 0:
+        return None
+    consonant = analyze_asset(consonant_file)
+    decay_length = consonant_length - (consonant['steady_end'] - consonant['onset'])
+    return min(max(10, min(steady_offset(vowel_file), decay_length)), consonant_length, vowel_length)
+
+def parse_syllable(syllable):
+    """Split a syllable into (consonant, vowel), return (None, None) if it cannot be parsed"""
+    # Try different consonant lengths (from long to short)
+    for i in range(min(4, len(syllable)), 0, -1):
+        consonant_candidate = syllable[:i]
+        vowel_candidate = syllable[i:]
+        
+        if vowel_candidate in vowels:
+            return consonant_candidate, vowel_candidate
+    
+    return None, None
+
+def syllable_source_files(syllable):
+    """Return the source files a syllable is rendered from, or None if it cannot be parsed"""
+    if syllable in vowels:
+        return (find_asset(vowel_path, f"{syllable}.wav") or os.path.join(vowel_path, f"{syllable}.wav"),)
+    
+    consonant_part, vowel_part = parse_syllable(syllable)
+    if consonant_part is None:
+        return None
+    return (find_asset(consonant_path, f"{consonant_part}-.wav") or os.path.join(consonant_path, f"{consonant_part}-.wav"),
+            find_asset(vowel_path, f"{vowel_part}.wav") or os.path.join(vowel_path, f"{vowel_part}.wav"))
+
 def process_syllable(syllable, error_report):
     """Process a single syllable and return audio data"""
     # Check if it's a pure vowel
     if syllable in vowels:
         # Directly use vowel file
-        vowel_file = os.path.join(vowel_path, f"{syllable}.wav")
-        if os.path.exists(vowel_file):
+        vowel_file = find_asset(vowel_path, f"{syllable}.wav")
+        if vowel_file is not None:
             try:
-                vowel_data, params = read_wav(vowel_file)
-                print(f"Loaded vowel: {syllable}")
+                vowel_data, params, _ = load_source(vowel_file)
+                console(f"Loaded vowel: {syllable}")
                 return vowel_data, params
             except Exception as e:
                 error_report.append(f"Error processing vowel {syllable}: {str(e)}")
                 return None, None
         else:
-            error_msg = f"Vowel file not found: {vowel_file}"
+            error_msg = f"Vowel file not found: {os.path.join(vowel_path, f'{syllable}.wav')}"
             error_report.append(error_msg)
-            print(f"Warning: {error_msg}")
+            console(f"Warning: {error_msg}")
             return None, None
     
     # Separate consonant and vowel parts
-    consonant_part = None
-    vowel_part = None
-    
-    # Try different consonant lengths (from long to short)
-    for i in range(min(4, len(syllable)), 0, -1):
-        consonant_candidate = syllable[:i]
-        vowel_candidate = syllable[i:]
-        
-        if vowel_candidate in vowels:
-            consonant_part = consonant_candidate
-            vowel_part = vowel_candidate
-            break
+    consonant_part, vowel_part = parse_syllable(syllable)
     
     if consonant_part is None or vowel_part is None:
         error_msg = f"Cannot parse syllable: {syllable}"
         error_report.append(error_msg)
-        print(f"Warning: {error_msg}")
+        console(f"Warning: {error_msg}")
         return None, None
     
-    # Build consonant filename
-    consonant_file = os.path.join(consonant_path, f"{consonant_part}-.wav")
-    vowel_file = os.path.join(vowel_path, f"{vowel_part}.wav")
+    # Look up consonant and vowel files in the source indexes
+    consonant_file = find_asset(consonant_path, f"{consonant_part}-.wav")
+    vowel_file = find_asset(vowel_path, f"{vowel_part}.wav")
     
     # Check if files exist
-    if not os.path.exists(consonant_file):
-        error_msg = f"Consonant file not found: {consonant_file}"
+    if consonant_file is None:
+        error_msg = f"Consonant file not found: {os.path.join(consonant_path, f'{consonant_part}-.wav')}"
         error_report.append(error_msg)
-        print(f"Warning: {error_msg}")
+        console(f"Warning: {error_msg}")
         return None, None
     
-    if not os.path.exists(vowel_file):
-        error_msg = f"Vowel file not found: {vowel_file}"
+    if vowel_file is None:
+        error_msg = f"Vowel file not found: {os.path.join(vowel_path, f'{vowel_part}.wav')}"
         error_report.append(error_msg)
-        print(f"Warning: {error_msg}")
+        console(f"Warning: {error_msg}")
         return None, None
     
     try:
-        # Read audio files
-        consonant_data, consonant_params = read_wav(consonant_file)
-        vowel_data, vowel_params = read_wav(vowel_file)
+        # Read audio files (decoded and validated once per asset)
+        consonant_data, consonant_params, consonant_error = load_source(consonant_file)
+        vowel_data, vowel_params, vowel_error = load_source(vowel_file)
         
-        # Ensure parameters match
-        if consonant_params.sampwidth != 2 or vowel_params.sampwidth != 2:
-            error_msg = f"Audio is not 16-bit format: {syllable}"
+        format_error = consonant_error or vowel_error
+        if format_error:
+            error_msg = f"{format_error}: {syllable}"
             error_report.append(error_msg)
-            print(f"Warning: {error_msg}")
+            console(f"Warning: {error_msg}")
             return None, None
         
-        if consonant_params.nchannels != 1 or vowel_params.nchannels != 1:
-            error_msg = f"Audio is not mono: {syllable}"
-            error_report.append(error_msg)
-            print(f"Warning: {error_msg}")
-            return None, None
-        
-        if consonant_params.framerate != 44100 or vowel_params.framerate != 44100:
-            error_msg = f"Audio sample rate is not 44100Hz: {syllable}"
-            error_report.append(error_msg)
-            print(f"Warning: {error_msg}")
-            return None, None
-        
-        # Concatenate audio
-        combined_audio = concatenate_audio(consonant_data, vowel_data, consonant_params)
+        # Concatenate audio, at the analyzed consonant-vowel boundary with --analyze
+        start = time.perf_counter() if profiling_enabled else None
+        crossfade_length = analyzed_crossfade_length(consonant_file, len(consonant_data), vowel_file, len(vowel_data))
+        if crossfade_length is None:
+            combined_audio = concatenate_audio(consonant_data, vowel_data, consonant_params)
+        else:
+            combined_audio = _to_array(_crossfade_numpy(_as_samples(consonant_data), _as_samples(vowel_data),
+                                                        crossfade_length))
+        if start is not None:
+            record_stage('splice', start, len(combined_audio))
         
-        print(f"Processed: {syllable}")
+        console(f"Processed: {syllable}")
         return combined_audio, consonant_params
     except Exception as e:
         error_msg = f"Error processing syllable {syllable}: {str(e)}"
         error_report.append(error_msg)
-        print(f"Error: {error_msg}")
+        console(f"Error: {error_msg}")
         return None, None
 
-def process_recording_line(line, error_report):
-    """Process a line from recording table and create combined audio file"""
+def rendered_syllable_length(syllable):
+    """Return the number of samples a syllable renders to, or None if its sources are unusable"""
+    source_files = syllable_source_files(syllable)
+    if source_files is None:
+        return None
+    
+    lengths = []
+    for source_file in source_files:
+        try:
+            audio_data, _, format_error = load_source(source_file)
+        except Exception:
+            return None
+        if format_error and syllable not in vowels:
+            return None
+        lengths.append(len(audio_data))
+    
+    if syllable in vowels:
+        return lengths[0]
+    
+    consonant_length, vowel_length = lengths
+    crossfade_length = analyzed_crossfade_length(source_files[0], consonant_length, source_files[1], vowel_length)
+    if crossfade_length is not None:
+        return consonant_length - crossfade_length + vowel_length
+    consonant_cut_pos = int(consonant_length * consonant_cut_fraction)
+    return consonant_cut_pos + crossfade_output_length(consonant_length - consonant_cut_pos, vowel_length,
+                                                       consonant_crossfade_fraction)
+
+def render_syllable(syllable, error_report, fade_fraction=None):
+    """Return the spliced and faded audio of a syllable, reusing earlier renders"""
+    global _syllable_profile
+    if fade_fraction is None:
+        fade_fraction = syllable_fade_fraction
+    
+    if profiling_enabled and _line_profile is not None:
+        _syllable_profile = {'syllable': syllable, 'cached': False, 'stages': {}}
+        _line_profile['syllables'].append(_syllable_profile)
+    else:
+        _syllable_profile = None
+    
+    # Key on the sources' current contents and every setting that shapes the result
+    key = None
+    source_files = syllable_source_files(syllable)
+    if source_files is not None:
+        try:
+            signatures = tuple((os.path.abspath(f),) + asset_signature(f) for f in source_files)
+            key = (syllable, signatures, consonant_cut_fraction, consonant_crossfade_fraction,
+                   fade_fraction, numpy_enabled(), analysis_settings(), normalize_settings())
+        except OSError:
+            # Missing sources are reported by process_syllable
+            key = None
+    
+    entry = _syllable_cache.get(key) if key is not None else None
+    if entry is not None:
+        _syllable_cache.move_to_end(key)
+        _syllable_cache_stats['hits'] += 1
+        if _syllable_profile is not None:
+            _syllable_profile['cached'] = True
+        console(f"Reused: {syllable}")
+        return entry
+    
+    audio_data, audio_params = process_syllable(syllable, error_report)
+    if audio_data is None or audio_params is None:
+        return None, None
+    
+    start = time.perf_counter() if profiling_enabled else None
+    faded_audio = apply_cosine_fadeout(audio_data, fade_fraction)
+    if start is not None:
+        record_stage('fadeout', start, len(faded_audio))
+    
+    if key is not None:
+        _syllable_cache_stats['misses'] += 1
+        _syllable_cache[key] = (faded_audio, audio_params)
+        _syllable_cache_stats['bytes'] += len(faded_audio) * faded_audio.itemsize
+        while _syllable_cache_stats['bytes'] > syllable_cache_max_bytes and _syllable_cache:
+            evicted_audio, _ = _syllable_cache.popitem(last=False)[1]
+            _syllable_cache_stats['bytes'] -= len(evicted_audio) * evicted_audio.itemsize
+            _syllable_cache_stats['evictions'] += 1
+    
+    return faded_audio, audio_params
+
+def syllable_cache_stats():
+    """Return hit/miss statistics and current size of the rendered syllable cache"""
+    stats = dict(_syllable_cache_stats)
+    stats['entries'] = len(_syllable_cache)
+    return stats
+
+def clear_syllable_cache():
+    """Drop all rendered syllables and reset the statistics"""
+    _syllable_cache.clear()
+    for name in _syllable_cache_stats:
+        _syllable_cache_stats[name] = 0
+
+def drop_stale_cache_entries():
+    """Drop decoded assets and rendered syllables whose sources changed or disappeared, return how many
+    
+    Stale entries are never served anyway, but a long-running process
+    should not keep them in memory until they are evicted. Entries are
+    keyed by absolute path, so source paths should be absolute.
+    """
+    def current_signature(file_path):
+        try:
+            return asset_signature(file_path)
+        except (OSError, KeyError):
+            return None
+    
+    dropped = 0
+    for key, entry in list(_asset_cache.items()):
+        if current_signature(key[0]) != entry[0]:
+            del _asset_cache[key]
+            dropped += 1
+    for key, entry in list(_asset_analyses.items()):
+        if current_signature(key) != entry[0]:
+            del _asset_analyses[key]
+            dropped += 1
+    for key in list(_syllable_cache):
+        if any(current_signature(source[0]) != source[1:] for source in key[1]):
+            audio_data, _ = _syllable_cache.pop(key)
+            _syllable_cache_stats['bytes'] -= len(audio_data) * audio_data.itemsize
+            dropped += 1
+    return dropped
+
+def clear_caches():
+    """Drop every in-memory cache: decoded assets, analyses, rendered syllables, source indexes, format checks and file hashes"""
+    with _asset_cache_lock:
+        clear_asset_cache()
+        _format_checks.clear()
+    clear_syllable_cache()
+    _asset_indexes.clear()
+    _file_hash_cache.clear()
+
+def check_asset_format(file_path):
+    """Read a source's header once per version of the file, return its format error or None"""
+    signature = asset_signature(file_path)
+    # Whether a source needs normalizing or is rejected depends on the mode
+    key = (file_path, normalize_sources)
+    checked = _format_checks.get(key)
+    if checked is not None and checked[0] == signature:
+        return checked[1]
+    try:
+        format_error = check_audio_format(read_wav_params(file_path))
+    except Exception as e:
+        format_error = f"Cannot read file: {str(e)}"
+    if format_error is not None and normalize_sources:
+        format_error = normalization_error(file_path)
+    with _asset_cache_lock:
+        _format_checks[key] = (signature, format_error)
+    return format_error
+
+def plan_recording_table(lines, rescan=True):
+    """Resolve every syllable against the source indexes before any audio work
+    
+    Returns (plan, problems). plan is a list of (line, [(syllable, consonant
+    file or None, vowel file)]) and problems lists every unparseable syllable
+    and every missing or invalid asset, each asset reported once. With
+    rescan=False the current indexes are used instead of scanning again.
+    """
+    if rescan:
+        build_asset_index(consonant_path)
+        build_asset_index(vowel_path)
+    
+    plan = []
+    problems = []
+    checked_files = set()
+    
+    def require(directory, file_name, kind, syllable):
+        file_path = find_asset(directory, file_name)
+        if file_path is None:
+            missing_path = os.path.join(directory, file_name)
+            if missing_path not in checked_files:
+                checked_files.add(missing_path)
+                problems.append(f"{kind} file not found: {missing_path} (needed by {syllable})")
+            return None
+        if file_path not in checked_files:
+            checked_files.add(file_path)
+            format_error = check_asset_format(file_path)
+            if format_error:
+                problems.append(f"{format_error}: {file_path}")
+        return file_path
+    
+    for line in lines:
+        line_plan = []
+        for syllable in line.split('_'):
+            if syllable in vowels:
+                line_plan.append((syllable, None, require(vowel_path, f"{syllable}.wav", "Vowel", syllable)))
+                continue
+            
+            consonant_part, vowel_part = parse_syllable(syllable)
+            if consonant_part is None:
+                problems.append(f"Cannot parse syllable: {syllable} in line {line}")
+                line_plan.append((syllable, None, None))
+                continue
+            
+            consonant_file = require(consonant_path, f"{consonant_part}-.wav", "Consonant", syllable)
+            vowel_file = require(vowel_path, f"{vowel_part}.wav", "Vowel", syllable)
+            line_plan.append((syllable, consonant_file, vowel_file))
+        plan.append((line, line_plan))
+    
+    return plan, problems
+
+def print_plan(plan, problems):
+    """Print a render plan and its problems"""
+    print(f"Render plan: {len(plan)} lines")
+    for line, line_plan in plan:
+        print(f"  {line}.wav")
+        for syllable, consonant_file, vowel_file in line_plan:
+            source_files = (vowel_file,) if syllable in vowels else (consonant_file, vowel_file)
+            sources = [os.path.basename(f) if f else "(missing)" for f in source_files]
+            print(f"    {syllable}: {' + '.join(sources)}")
+    
+    if problems:
+        print(f"\n{len(problems)} problems found:")
+        for problem in problems:
+            print(f"  {problem}")
+    else:
+        print("\nAll assets found and valid.")
+
+def syllable_splice_points(syllable):
+    """Return (consonant attack, vowel onset, vowel fully in) in samples from the start of a rendered syllable
+    
+    For a CV syllable the vowel fades in over the consonant-vowel crossfade
+    that ends where the consonant source ends; pure vowels start at 0. The
+    consonant attack is where the consonant reaches full level, or None
+    without --analyze. With --analyze the crossfade covers the vowel's
+    attack, so the vowel is fully in once it reaches its steady state.
+    """
+    if syllable in vowels:
+        vowel_full = steady_offset(find_asset(vowel_path, f"{syllable}.wav"))
+        return (0 if analysis_settings() is not None else None), 0, vowel_full
+    
+    consonant_part, vowel_part = parse_syllable(syllable)
+    consonant_file = find_asset(consonant_path, f"{consonant_part}-.wav")
+    vowel_file = find_asset(vowel_path, f"{vowel_part}.wav")
+    consonant_data, _, _ = load_source(consonant_file)
+    vowel_data, _, _ = load_source(vowel_file)
+    
+    consonant_length = len(consonant_data)
+    crossfade_length = analyzed_crossfade_length(consonant_file, consonant_length, vowel_file, len(vowel_data))
+    if crossfade_length is None:
+        remainder_length = consonant_length - int(consonant_length * consonant_cut_fraction)
+        crossfade_length = crossfade_length_for(remainder_length, len(vowel_data), consonant_crossfade_fraction)
+        consonant_attack = None
+    else:
+        consonant_attack = steady_offset(consonant_file)
+    vowel_onset = max(0, consonant_length - crossfade_length)
+    return consonant_attack, vowel_onset, max(consonant_length, vowel_onset + steady_offset(vowel_file))
+
+def syllable_vowel(syllable):
+    """Return the vowel a syllable ends with"""
+    if syllable in vowels:
+        return syllable
+    return parse_syllable(syllable)[1]
+
+def line_oto_entries(line, segment_lengths, framerate):
+    """Build CV, VC, vowel transition and ending oto.ini entries for a rendered line
+    
+    Returns a list of [wav file, alias, offset, consonant, cutoff,
+    preutterance, overlap] with times in milliseconds, derived from the
+    splice and crossfade positions used to render the line. With --analyze
+    the CV overlap is where the consonant reaches full level instead of the
+    end of the line crossfade. Returns an empty list if the line layout
+    cannot be computed.
+    """
+    layout = plan_line_layout(segment_lengths, line_crossfade_fraction)
+    if layout is None:
+        return []
+    offsets, crossfades, total_length = layout
+    syllables = line.split('_')
+    wav_file = f"{line}.wav"
+    entries = []
+    
+    def add(alias, offset, consonant, cutoff_end, preutterance, overlap):
+        # Positions are absolute sample indexes; oto.ini wants ms relative to offset
+        def to_ms(samples):
+            return round(samples * 1000 / framerate, 3)
+        consonant = min(max(consonant, preutterance), cutoff_end)
+        entries.append([wav_file, alias, to_ms(offset), to_ms(consonant - offset),
+                        -to_ms(cutoff_end - offset), to_ms(preutterance - offset), to_ms(overlap - offset)])
+    
+    points = []
+    for i, syllable in enumerate(syllables):
+        start = offsets[i]
+        attack, onset, full = syllable_splice_points(syllable)
+        length = segment_lengths[i]
+        end = offsets[i + 1] if i + 1 < len(syllables) else total_length
+        fade_start = start + length - max(1, int(length * syllable_fade_fraction))
+        overlap = start + crossfades[i] if attack is None else start + min(attack, onset)
+        points.append((start + onset, start + full, fade_start, end, overlap))
+    
+    for i, syllable in enumerate(syllables):
+        start = offsets[i]
+        vowel_onset, vowel_full, fade_start, end, overlap = points[i]
+        steady = max(0, fade_start - vowel_full)
+        vowel = syllable_vowel(syllable)
+        hiragana = _romaji_to_hiragana.get(syllable)
+        
+        if i == 0:
+            # Line-initial alias: "- ka" / "- a"
+            aliases = [f"- {syllable}"] + ([f"- {hiragana}"] if hiragana else [])
+            for alias in aliases:
+                add(alias, start, vowel_full + steady // 3, end, vowel_onset, start)
+        else:
+            previous_vowel = syllable_vowel(syllables[i - 1])
+            transition_offset = (points[i - 1][1] + start) // 2
+            transition_end = start + crossfades[i]
+            if syllable in vowels:
+                # Vowel transition: "a i" / "a い"
+                aliases = [f"{previous_vowel} {syllable}"] + ([f"{previous_vowel} {hiragana}"] if hiragana else [])
+                for alias in aliases:
+                    add(alias, transition_offset, transition_end + steady // 3, end, transition_end, start)
+            else:
+                # VC: "a k", ends where the vowel starts
+                consonant_part = parse_syllable(syllable)[0]
+                add(f"{previous_vowel} {consonant_part}", transition_offset,
+                    (transition_end + vowel_onset) // 2, vowel_onset, transition_end, start)
+        
+        # CV (or plain vowel) alias, overlapping the crossfade with the previous syllable
+        aliases = [syllable] + ([hiragana] if hiragana else [])
+        for alias in aliases:
+            add(alias, start, vowel_full + steady // 3, end, vowel_onset, overlap)
+        
+        if i == len(syllables) - 1:
+            # Line-final release: "a -"
+            add(f"{vowel} -", vowel_full, fade_start, end, fade_start, vowel_full)
+    
+    return entries
+
+def oto_ini_text(entries):
+    """Format oto.ini entries, numbering repeated aliases in entry order
+    
+    The first entry keeps the plain alias, which UTAU uses by default; later
+    ones become alias2, alias3, ... (a k2, or じ2 for ji after zi), so no
+    entry is lost when different syllables share a hiragana alias.
+    """
+    used_aliases = {alias for _, alias, *_ in entries}
+    counts = {}
+    lines = []
+    for wav_file, alias, *values in entries:
+        count = counts.get(alias, 0) + 1
+        name = alias
+        if count > 1:
+            name = f"{alias}{count}"
+            while name in used_aliases:
+                count += 1
+                name = f"{alias}{count}"
+            used_aliases.add(name)
+        counts[alias] = count
+        lines.append(f"{wav_file}={name}," + ','.join(f"{value:g}" for value in values) + '\n')
+    return ''.join(lines)
+
+def write_oto_ini(directory, entries):
+    """Write oto.ini entries to directory, numbering repeated aliases (see oto_ini_text)"""
+    oto_file = os.path.join(directory, oto_filename)
+    with open(oto_file, 'w', encoding=oto_encoding) as f:
+        f.write(oto_ini_text(entries))
+    return oto_file
+
+class DirectorySink:
+    """Output sink writing each rendered file into a folder"""
+    
+    thread_safe = True
+    
+    def __init__(self, directory):
+        self.directory = directory
+    
+    def location(self, name):
+        """Return where a file of this name ends up, for messages"""
+        return os.path.join(self.directory, name)
+    
+    def open(self, name):
+        """Return a binary file object to write the file to"""
+        return open(self.location(name), 'wb')
+    
+    def close(self, name, f, keep):
+        """Finish a file; a file that is not kept is removed"""
+        f.close()
+        if not keep:
+            try:
+                os.remove(self.location(name))
+            except OSError:
+                pass
+
+class MemorySink:
+    """Output sink keeping each rendered file as bytes in files (name -> bytes)
+    
+    The files are deferred: whoever takes them from files writes them out.
+    """
+    
+    thread_safe = True
+    deferred = True
+    
+    def __init__(self):
+        self.files = {}
+    
+    def location(self, name):
+        return name
+    
+    def open(self, name):
+        return io.BytesIO()
+    
+    def close(self, name, f, keep):
+        if keep:
+            self.files[name] = f.getvalue()
+
+class ZipSink:
+    """Output sink writing each rendered file into a zip voicebank archive
+    
+    Entries are written in the order they are finished, with a fixed
+    timestamp, so the same inputs give the same archive. Each file is held
+    in memory only until it is complete; a failed line never leaves a
+    partial entry. finish() appends the SHA-256 checksum list and moves the
+    archive into place.
+    """
+    
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self.temp_path = archive_path + '.tmp'
+        self.archive = zipfile.ZipFile(self.temp_path, 'w', zipfile.ZIP_DEFLATED)
+        self.checksums = []
+    
+    def location(self, name):
+        return os.path.join(self.archive_path, name)
+    
+    def open(self, name):
+        return io.BytesIO()
+    
+    def close(self, name, f, keep):
+        if keep:
+            self.write(name, f.getvalue())
+    
+    def write(self, name, data):
+        """Add a complete file to the archive"""
+        info = zipfile.ZipInfo(name, date_time=package_entry_date)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        self.archive.writestr(info, data)
+        self.checksums.append((name, hashlib.sha256(data).hexdigest()))
+    
+    def finish(self):
+        """Write the checksum list and replace any previous archive"""
+        checksums = ''.join(f"{digest}  {name}\n" for name, digest in self.checksums)
+        self.write(package_checksum_filename, checksums.encode('utf-8'))
+        self.archive.close()
+        os.replace(self.temp_path, self.archive_path)
+    
+    def abort(self):
+        """Discard the unfinished archive"""
+        self.archive.close()
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+class WriterPool:
+    """Output sink wrapper handing finished files to writer threads
+    
+    Each file is rendered into memory and written to the wrapped sink in
+    the background while the next lines render. At most depth files wait to
+    be written; closing another one blocks until a writer catches up, so
+    memory stays bounded. Sinks that are not thread_safe get one writer,
+    which also keeps their files in order. Each file is reported as
+    generated when its write completes. finish() waits for every write and
+    returns {file name: error message} for the ones that failed.
+    """
+    
+    deferred = True
+    
+    def __init__(self, sink, threads, depth):
+        self.sink = sink
+        threads = threads if getattr(sink, 'thread_safe', False) else 1
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.slots = threading.BoundedSemaphore(depth)
+        self.failures = {}
+    
+    def location(self, name):
+        return self.sink.location(name)
+    
+    def open(self, name):
+        return io.BytesIO()
+    
+    def close(self, name, f, keep):
+        if keep:
+            self.write(name, f.getvalue())
+    
+    def write(self, name, data):
+        """Queue a complete file, waiting while depth files are already queued"""
+        self.slots.acquire()
+        self.executor.submit(self._write, name, data)
+    
+    def _write(self, name, data):
+        f = None
+        try:
+            f = self.sink.open(name)
+            f.write(data)
+            self.sink.close(name, f, True)
+            if not getattr(self.sink, 'deferred', False):
+                console(f"Generated: {self.sink.location(name)}")
+        except Exception as e:
+            self.failures[name] = f"Error writing file {self.sink.location(name)}: {str(e)}"
+            if f is not None:
+                try:
+                    self.sink.close(name, f, False)
+                except Exception:
+                    pass
+        finally:
+            self.slots.release()
+    
+    def finish(self):
+        """Wait for all queued writes, return the failed ones"""
+        self.executor.shutdown()
+        return dict(self.failures)
+
+def prefetch_line_sources(line):
+    """Decode (and with --analyze analyze) every source of a line into the asset cache
+    
+    Runs on a prefetch thread; problems are left for rendering to report.
+    """
+    _thread_state.prefetching = True
+    for syllable in line.split('_'):
+        for source_file in syllable_source_files(syllable) or ():
+            try:
+                load_source(source_file)
+            except Exception:
+                pass
+
+class Prefetcher:
+    """Decode the sources of upcoming lines on I/O threads while the current line renders
+    
+    wait(i) is called before rendering lines[i]: it keeps lines up to
+    i + depth scheduled and waits until line i's sources are decoded, so a
+    source is never decoded twice.
+    """
+    
+    def __init__(self, lines, threads, depth):
+        self.lines = lines
+        self.depth = depth
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.futures = deque()
+        self.scheduled = 0
+    
+    def wait(self, index):
+        while self.scheduled < min(len(self.lines), index + 1 + self.depth):
+            self.futures.append(self.executor.submit(prefetch_line_sources, self.lines[self.scheduled]))
+            self.scheduled += 1
+        self.futures.popleft().result()
+    
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+def process_recording_line(line, error_report, oto_entries=None, sink=None):
+    """Process a line from recording table and create combined audio file
+    
+    The file goes to sink (a DirectorySink of output_path by default). If
+    oto_entries is a list, the line's oto.ini entries are appended to it.
+    """
+    global _line_profile, _syllable_profile
+    if sink is None:
+        sink = DirectorySink(output_path)
+    if not profiling_enabled:
+        return _process_recording_line(line, error_report, oto_entries, sink)
+    
+    start = time.perf_counter()
+    _line_profile = {'line': line, 'stages': {}, 'syllables': []}
+    try:
+        success = _process_recording_line(line, error_report, oto_entries, sink)
+    finally:
+        _line_profile['seconds'] = time.perf_counter() - start
+        _line_profiles.append(_line_profile)
+        _line_profile = None
+        _syllable_profile = None
+    _line_profiles[-1]['success'] = success
+    return success
+
+def _process_recording_line(line, error_report, oto_entries, sink):
+    """Render and write one line, see process_recording_line"""
     syllables = line.split('_')
+    output_file = f"{line}.wav"
+    
+    # Stream the line to disk when every syllable length is known up front
+    segment_lengths = None
+    if streaming_output:
+        segment_lengths = [rendered_syllable_length(syllable) for syllable in syllables]
+        if None in segment_lengths or plan_line_layout(segment_lengths, line_crossfade_fraction) is None:
+            segment_lengths = None
+    
+    if segment_lengths is not None:
+        params = stream_recording_line(line, syllables, segment_lengths, sink, output_file, error_report)
+    else:
+        segment_lengths, params = write_recording_line(line, syllables, sink, output_file, error_report)
+    if params is None:
+        return False
+    
+    if oto_entries is not None:
+        oto_entries.extend(line_oto_entries(line, segment_lengths, params.framerate))
+    # Deferred sinks report the file once it is actually written
+    if not getattr(sink, 'deferred', False):
+        console(f"Generated: {sink.location(output_file)}")
+    return True
+
+def stream_recording_line(line, syllables, segment_lengths, sink, output_file, error_report):
+    """Render syllables one at a time and write finished samples as soon as no later crossfade reaches them
+    
+    Only the current syllable and the unwritten crossfade window are held in
+    memory. Returns the audio parameters, or None on failure (a partial
+    output file is removed).
+    """
+    offsets, crossfades, total_length = plan_line_layout(segment_lengths, line_crossfade_fraction)
+    
+    # Samples before the earliest later crossfade are final after syllable i
+    flush_limits = [total_length] * len(syllables)
+    for i in range(len(syllables) - 1, 0, -1):
+        flush_limits[i - 1] = min(flush_limits[i], offsets[i])
+    
+    wav_file = None
+    f = None
+    params = None
+    pending = array.array('h')
+    pending_start = 0
+    try:
+        for i, syllable in enumerate(syllables):
+            # Splice and apply cosine fadeout to the last 30% of each syllable
+            faded_audio, audio_params = render_syllable(syllable, error_report)
+            if faded_audio is None or audio_params is None:
+                error_report.append(f"Failed to process syllable {syllable} in line {line}")
+                return None
+            if len(faded_audio) != segment_lengths[i]:
+                raise ValueError(f"syllable {syllable} has {len(faded_audio)} samples, expected {segment_lengths[i]}")
+            
+            if wav_file is None:
+                params = audio_params._replace(nframes=total_length)
+                f = sink.open(output_file)
+                wav_file = wave.open(f, 'wb')
+                wav_file.setparams(params)
+            
+            # Crossfade with the unwritten end of the previous syllables
+            start = time.perf_counter() if profiling_enabled else None
+            offset = offsets[i] - pending_start
+            crossfade_length = crossfades[i]
+            mixed = mix_crossfade(pending[offset:offset + crossfade_length], faded_audio[:crossfade_length])
+            pending = pending[:offset] + mixed + faded_audio[crossfade_length:]
+            if start is not None:
+                record_stage('crossfade', start, len(faded_audio))
+            
+            start = time.perf_counter() if profiling_enabled else None
+            flush_count = flush_limits[i] - pending_start
+            wav_file.writeframes(pending[:flush_count].tobytes())
+            pending = pending[flush_count:]
+            pending_start += flush_count
+            if start is not None:
+                record_stage('write', start, flush_count)
+        
+        wav_file.close()
+        wav_file = None
+        sink.close(output_file, f, True)
+        f = None
+        return params
+    except Exception as e:
+        error_msg = f"Error writing file {sink.location(output_file)}: {str(e)}"
+        error_report.append(error_msg)
+        console(f"Error: {error_msg}")
+        return None
+    finally:
+        if wav_file is not None:
+            try:
+                wav_file.close()
+            except Exception:
+                pass
+        if f is not None:
+            # Do not leave a truncated line behind
+            sink.close(output_file, f, False)
+
+def render_line_audio(line, syllables, error_report):
+    """Render a whole line in memory, return (audio data, parameters, syllable lengths) or (None, None, None)"""
     syllable_audios = []
     params = None
     
     # Process each syllable in the line
     for syllable in syllables:
-        audio_data, audio_params = process_syllable(syllable, error_report)
-        if audio_data is not None and audio_params is not None:
-            # Apply cosine fadeout to the last 30% of each syllable
-            faded_audio = apply_cosine_fadeout(audio_data, 0.3)
+        # Splice and apply cosine fadeout to the last 30% of each syllable
+        faded_audio, audio_params = render_syllable(syllable, error_report)
+        if faded_audio is not None and audio_params is not None:
             syllable_audios.append(faded_audio)
             if params is None:
                 params = audio_params
         else:
             error_report.append(f"Failed to process syllable {syllable} in line {line}")
-            return False
+            return None, None, None
     
     if not syllable_audios:
         error_report.append(f"No valid syllables processed for line {line}")
-        return False
+        return None, None, None
     
     # Concatenate all syllables with cosine crossfade between them
-    combined_audio = syllable_audios[0]
-    
-    for i in range(1, len(syllable_audios)):
-        combined_audio = cosine_crossfade_segments(combined_audio, syllable_audios[i], 0.05)
+    start = time.perf_counter() if profiling_enabled else None
+    combined_audio = assemble_line(syllable_audios, line_crossfade_fraction)
+    if start is not None:
+        record_stage('crossfade', start, len(combined_audio))
+    return combined_audio, params, [len(audio) for audio in syllable_audios]
+
+def write_recording_line(line, syllables, sink, output_file, error_report):
+    """Render a whole line in memory and write it, return (syllable lengths, parameters) or (None, None)"""
+    combined_audio, params, segment_lengths = render_line_audio(line, syllables, error_report)
+    if combined_audio is None:
+        return None, None
     
     # Write output file
-    output_file = os.path.join(output_path, f"{line}.wav")
+    f = None
     try:
-        write_wav(output_file, combined_audio, params)
-        print(f"Generated: {output_file}")
-        return True
+        start = time.perf_counter() if profiling_enabled else None
+        f = sink.open(output_file)
+        write_wav(f, combined_audio, params)
+        sink.close(output_file, f, True)
+        if start is not None:
+            record_stage('write', start, len(combined_audio))
+        return segment_lengths, params
     except Exception as e:
-        error_msg = f"Error writing file {output_file}: {str(e)}"
+        if f is not None:
+            sink.close(output_file, f, False)
+        error_msg = f"Error writing file {sink.location(output_file)}: {str(e)}"
         error_report.append(error_msg)
-        print(f"Error: {error_msg}")
-        return False
+        console(f"Error: {error_msg}")
+        return None, None
+
+def error_report_text(error_report, timestamp=True):
+    """Format the error report, without the generation time if timestamp is False (for reproducible archives)"""
+    lines = ["Audio Concatenation Error Report"]
+    if timestamp:
+        lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.extend(["=" * 50, "",
+                  f"Total errors: {len(error_report)}", ""])
+    lines.extend(f"{i}. {error}" for i, error in enumerate(error_report, 1))
+    return '\n'.join(lines) + '\n'
 
 def generate_error_report(error_report):
     """Generate error report"""
@@ -315,40 +1761,727 @@ def generate_error_report(error_report):
         return
     
     # Create error report file
+    os.makedirs(output_path, exist_ok=True)
     report_file = os.path.join(output_path, f"error_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
     
     with open(report_file, 'w', encoding='utf-8') as f:
-        f.write("Audio Concatenation Error Report\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write("=" * 50 + "\n\n")
-        
-        f.write(f"Total errors: {len(error_report)}\n\n")
-        
-        for i, error in enumerate(error_report, 1):
-            f.write(f"{i}. {error}\n")
+        f.write(error_report_text(error_report))
     
     print(f"\nError report generated: {report_file}")
 
-def main():
-    """Main function"""
-    print("Starting audio concatenation...")
+def file_sha256(file_path):
+    """Return the SHA-256 hex digest of a file, reusing it while mtime and size are unchanged"""
+    key = os.path.abspath(file_path)
+    signature = asset_signature(file_path)
+    cached = _file_hash_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    digest = hashlib.sha256()
+    with open_asset(file_path) as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    _file_hash_cache[key] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+def dsp_settings():
+    """Return the settings that determine rendered audio, as stored in the build manifest"""
+    settings = {
+        'consonant_cut_fraction': consonant_cut_fraction,
+        'consonant_crossfade_fraction': consonant_crossfade_fraction,
+        'syllable_fade_fraction': syllable_fade_fraction,
+        'line_crossfade_fraction': line_crossfade_fraction,
+        'numpy': numpy_enabled(),
+    }
+    # Only present with --analyze and --normalize, so manifests written without them stay valid
+    if analysis_settings() is not None:
+        settings['analysis'] = list(analysis_settings())
+    if normalize_settings() is not None:
+        settings['normalize'] = list(normalize_settings())
+    return settings
+
+def line_source_hashes(line):
+    """Return {source file: SHA-256} for every file a line is rendered from, or None if any is unavailable"""
+    hashes = {}
+    for syllable in line.split('_'):
+        source_files = syllable_source_files(syllable)
+        if source_files is None:
+            return None
+        for source_file in source_files:
+            if source_file not in hashes:
+                try:
+                    hashes[source_file] = file_sha256(source_file)
+                except OSError:
+                    return None
+    return hashes
+
+def load_manifest(directory):
+    """Load the build manifest from directory, return an empty manifest if missing or unreadable"""
+    manifest_file = os.path.join(directory, manifest_filename)
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == manifest_version and isinstance(manifest.get('lines'), dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': manifest_version, 'lines': {}}
+
+def save_manifest(directory, manifest):
+    """Write the build manifest to directory, replacing the previous one atomically"""
+    manifest_file = os.path.join(directory, manifest_filename)
+    temp_file = manifest_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_file, manifest_file)
+
+def line_is_up_to_date(line, manifest, settings, source_hashes):
+    """Return True if a line's output exists and was built from these source hashes and settings"""
+    record = manifest['lines'].get(line)
+    if record is None or record.get('settings') != settings:
+        return False
+    
+    if source_hashes is None or record.get('sources') != source_hashes:
+        return False
+    
+    output_file = os.path.join(output_path, f"{line}.wav")
+    try:
+        return file_sha256(output_file) == record.get('output')
+    except OSError:
+        return False
+
+def update_manifest(manifest, line_results, settings, line_oto_entries, line_sources):
+    """Record sources, settings, output hash and oto.ini entries of rendered lines, forget failed ones
     
-    # Initialize error report
+    line_sources holds each line's source hashes taken before rendering, so
+    a source edited during the build no longer matches and is rebuilt on
+    the next run.
+    """
+    for line, success in line_results.items():
+        source_hashes = line_sources.get(line) if success else None
+        if source_hashes is None:
+            manifest['lines'].pop(line, None)
+            continue
+        manifest['lines'][line] = {
+            'sources': source_hashes,
+            'settings': settings,
+            'output': file_sha256(os.path.join(output_path, f"{line}.wav")),
+            'oto': line_oto_entries.get(line, []),
+        }
+
+def summarize_stages(line_profiles):
+    """Add up the stage totals of all line profiles"""
+    totals = {}
+    for profile in line_profiles:
+        for stage, stage_totals in profile['stages'].items():
+            summary = totals.setdefault(stage, {'seconds': 0.0, 'samples': 0, 'calls': 0})
+            for name in summary:
+                summary[name] += stage_totals[name]
+    return totals
+
+def write_run_report(directory, report):
+    """Write a JSON run report to directory, return its path"""
+    report_file = os.path.join(directory, f"run_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report_file
+
+def finish_run(report_dir, started, run_start, jobs, counts, error_report, cache_stats, asset_stats, line_profiles,
+               **fields):
+    """Write the run report (with --profile) and print the closing summary
+    
+    counts is (successful, failed, up to date), with None for up to date
+    when lines are never skipped. Extra fields go into the report after
+    the settings.
+    """
+    processed_count, error_count, skipped_count = counts
+    if profiling_enabled:
+        report = {
+            'started': started.isoformat(timespec='seconds'),
+            'seconds': time.perf_counter() - run_start,
+            'jobs': jobs,
+            'settings': dsp_settings(),
+            **fields,
+            'lines_processed': processed_count,
+            'lines_failed': error_count,
+        }
+        if skipped_count is not None:
+            report['lines_up_to_date'] = skipped_count
+        report.update({
+            'errors': error_report,
+            'syllable_cache': cache_stats,
+            'asset_cache': asset_stats,
+            'stages': summarize_stages(line_profiles),
+            'lines': line_profiles,
+        })
+        report_file = write_run_report(report_dir, report)
+        print(f"\nRun report generated: {report_file}")
+    
+    summary = f"\nProcessing complete! Successful: {processed_count}, Failed: {error_count}"
+    if skipped_count is not None:
+        summary += f", Up to date: {skipped_count}"
+    print(summary)
+    print(f"Syllable cache: {cache_stats.get('hits', 0)} reused, {cache_stats.get('misses', 0)} rendered")
+
+def _worker_settings():
+    """Collect module settings that worker processes must share with the parent"""
+    return {
+        'consonant_path': consonant_path,
+        'vowel_path': vowel_path,
+        'output_path': output_path,
+        'use_numpy': use_numpy,
+        'streaming_output': streaming_output,
+        'consonant_cut_fraction': consonant_cut_fraction,
+        'consonant_crossfade_fraction': consonant_crossfade_fraction,
+        'syllable_fade_fraction': syllable_fade_fraction,
+        'line_crossfade_fraction': line_crossfade_fraction,
+        'syllable_cache_max_bytes': syllable_cache_max_bytes,
+        'profiling_enabled': profiling_enabled,
+        'normalize_sources': normalize_sources,
+        'normalized_cache_dir': normalized_cache_dir,
+        'splice_analysis': splice_analysis,
+        'analysis_frame_ms': analysis_frame_ms,
+        'analysis_silence_db': analysis_silence_db,
+        'analysis_zcr_threshold': analysis_zcr_threshold,
+        'analysis_steady_db': analysis_steady_db,
+        'asset_store_dir': _asset_store['dir'] if _asset_store is not None else None,
+    }
+
+def _init_worker(settings):
+    """Apply the parent's settings in a worker process"""
+    settings = dict(settings)
+    store_dir = settings.pop('asset_store_dir')
+    globals().update(settings)
+    # Forked workers must not share the parent's open zip archives; re-index lazily
+    _asset_indexes.clear()
+    _open_archives.clear()
+    _archive_members.clear()
+    # Every worker maps the same store file, so the decoded samples are shared
+    if store_dir is not None:
+        open_asset_store(store_dir)
+
+def _bank_settings():
+    """Collect the settings that differ between banks of a batch"""
+    return {'vowel_path': vowel_path, 'output_path': output_path}
+
+def _render_line_task(task, sink=None):
+    """Render one line in a worker process, capturing its console output, errors, cache activity, profile and oto entries
+    
+    If the task asks for it, the line is rendered into memory and its
+    files are returned for the parent process to write to its sink.
+    """
+    bank, line, in_memory = task
+    globals().update(bank)
     error_report = []
+    oto_entries = []
+    if in_memory:
+        sink = MemorySink()
+    stats_before = syllable_cache_stats()
+    asset_stats_before = asset_cache_stats()
+    with capture_console() as messages:
+        success = process_recording_line(line, error_report, oto_entries, sink)
+    stats_after = syllable_cache_stats()
+    asset_stats_after = asset_cache_stats()
+    cache_activity = {name: stats_after[name] - stats_before[name] for name in ('hits', 'misses', 'evictions')}
+    asset_activity = {name: asset_stats_after[name] - asset_stats_before[name] for name in ('hits', 'misses')}
+    files = sink.files if in_memory else {}
+    console_output = ''.join(f"{message}\n" for message in messages)
+    return (success, error_report, console_output, cache_activity, take_line_profiles(), oto_entries, files,
+            asset_activity)
+
+def bounded_map(executor, function, tasks, depth):
+    """Like executor.map, but submit a task only while fewer than depth results wait to be taken"""
+    pending = deque()
+    for task in tasks:
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, task))
+    while pending:
+        yield pending.popleft().result()
+
+def render_lines(lines, error_report, jobs=1, cache_stats=None, line_results=None, line_profiles=None,
+                 line_oto_entries=None, executor=None, sink=None, asset_stats=None):
+    """Render lines in order or across a process pool, return (successful, failed) counts
+    
+    An existing executor (see create_executor) is used if given, so workers
+    and their caches can be shared by several calls. If cache_stats is a
+    dict, syllable cache hits/misses/evictions of all processes are added
+    to it, and decoded asset cache hits/misses to asset_stats if that is a
+    dict. If line_results is a dict, it receives the
+    success flag of each line. If line_profiles is a list, the stage
+    profiles of the lines are appended to it in line order. If
+    line_oto_entries is a dict, it receives the oto.ini entries of each line.
+    Lines go to sink (a DirectorySink of output_path by default); workers
+    render into memory and the files are written to the sink here. With
+    pipeline_io, sources are prefetched and files written on threads (see
+    Prefetcher and WriterPool), and workers run at most pipeline_depth lines
+    ahead of the writes.
+    """
     processed_count = 0
     error_count = 0
     
-    # Process all lines in recording table
-    for line in recording_table:
-        if process_recording_line(line, error_report):
-            processed_count += 1
+    prefetcher = None
+    writer_pool = None
+    if pipeline_io:
+        sink = writer_pool = WriterPool(sink or DirectorySink(output_path), writer_threads, pipeline_depth)
+    
+    own_executor = None
+    if executor is None and jobs > 1:
+        executor = own_executor = create_executor(jobs)
+    # Prefetch threads decode between and during lines, so in this process the cache is counted as a whole
+    asset_stats_before = asset_cache_stats() if executor is None else None
+    if executor is None:
+        if pipeline_io:
+            prefetcher = Prefetcher(lines, prefetch_threads, pipeline_depth)
+        
+        def render_here():
+            for i, line in enumerate(lines):
+                if prefetcher is not None:
+                    prefetcher.wait(i)
+                yield _render_line_task((_bank_settings(), line, False), sink)
+        results = render_here()
+    else:
+        tasks = [(_bank_settings(), line, sink is not None) for line in lines]
+        if pipeline_io:
+            results = bounded_map(executor, _render_line_task, tasks, pipeline_depth + jobs)
         else:
-            error_count += 1
+            results = executor.map(_render_line_task, tasks)
+    
+    try:
+        # Results arrive in reclist order, so output and errors are deterministic
+        for line, (success, line_errors, console_output, cache_activity, profiles, oto_entries,
+                   files, asset_activity) in zip(lines, results):
+            console(console_output, end='')
+            for name, data in files.items():
+                f = sink.open(name)
+                f.write(data)
+                sink.close(name, f, True)
+                if not getattr(sink, 'deferred', False):
+                    console(f"Generated: {sink.location(name)}")
+            if line_oto_entries is not None:
+                line_oto_entries[line] = oto_entries
+            if line_profiles is not None:
+                line_profiles.extend(profiles)
+            if line_results is not None:
+                line_results[line] = success
+            error_report.extend(line_errors)
+            if cache_stats is not None:
+                for name, count in cache_activity.items():
+                    cache_stats[name] = cache_stats.get(name, 0) + count
+            if asset_stats is not None and asset_stats_before is None:
+                for name, count in asset_activity.items():
+                    asset_stats[name] = asset_stats.get(name, 0) + count
+            if success:
+                processed_count += 1
+            else:
+                error_count += 1
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+        failures = writer_pool.finish() if writer_pool is not None else {}
+        if own_executor is not None:
+            own_executor.shutdown()
+    if asset_stats is not None and asset_stats_before is not None:
+        asset_stats_after = asset_cache_stats()
+        for name in ('hits', 'misses'):
+            asset_stats[name] = asset_stats.get(name, 0) + asset_stats_after[name] - asset_stats_before[name]
+    
+    # Lines whose file could not be written in the background count as failed
+    for line in lines:
+        error_msg = failures.get(f"{line}.wav")
+        if error_msg is None:
+            continue
+        error_report.append(error_msg)
+        print(f"Error: {error_msg}")
+        if line_results is not None:
+            line_results[line] = False
+        if line_oto_entries is not None:
+            line_oto_entries.pop(line, None)
+        processed_count -= 1
+        error_count += 1
+    
+    return processed_count, error_count
+
+def create_executor(jobs):
+    """Start a worker pool that shares the current module settings"""
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(_worker_settings(),))
+
+class RenderError(Exception):
+    """A line or syllable could not be rendered; errors lists every problem found"""
+    
+    def __init__(self, errors):
+        super().__init__('; '.join(errors) or "Rendering failed")
+        self.errors = errors
+
+class Renderer:
+    """Render lines and syllables from one consonant and vowel source pair without a script run
+    
+    Settings are keyword arguments named like the module settings, e.g.
+    Renderer("C_Japanese.zip", "vowels", syllable_fade_fraction=0.25).
+    Decoded assets and rendered syllables stay cached between calls and
+    are re-read when a source file changes; call refresh() after adding or
+    removing source files. Several renderers can share a process; their
+    calls are serialized, and the module settings are restored after each
+    call. Progress messages are discarded without touching sys.stdout.
+    """
+    
+    setting_names = ('consonant_cut_fraction', 'consonant_crossfade_fraction', 'syllable_fade_fraction',
+                     'line_crossfade_fraction', 'use_numpy', 'normalize_sources', 'normalized_cache_dir',
+                     'asset_cache_max_entries', 'syllable_cache_max_bytes', 'splice_analysis',
+                     'analysis_frame_ms', 'analysis_silence_db', 'analysis_zcr_threshold', 'analysis_steady_db')
+    
+    def __init__(self, consonant_path, vowel_path, **settings):
+        unknown = sorted(set(settings) - set(self.setting_names))
+        if unknown:
+            raise TypeError(f"Unknown renderer settings: {', '.join(unknown)}")
+        self.settings = {name: globals()[name] for name in self.setting_names}
+        self.settings.update(settings, consonant_path=consonant_path, vowel_path=vowel_path)
+        self.refresh()
+    
+    @contextlib.contextmanager
+    def _applied(self):
+        """Make this renderer's settings the module settings for one call, then restore the previous ones"""
+        with _renderer_lock, capture_console():
+            module = globals()
+            previous = {name: module[name] for name in self.settings}
+            module.update(self.settings)
+            try:
+                yield
+            finally:
+                module.update(previous)
+    
+    def refresh(self):
+        """Rescan the source folders or archives, return the number of stale cache entries dropped"""
+        with self._applied():
+            build_asset_index(consonant_path)
+            build_asset_index(vowel_path)
+            return drop_stale_cache_entries()
+    
+    def check(self, lines):
+        """Return the missing or invalid assets that the given lines need"""
+        with self._applied():
+            return plan_recording_table(lines, rescan=False)[1]
+    
+    def render_syllable_audio(self, syllable):
+        """Return (audio data, parameters) of one spliced and faded syllable, as a copy the caller may modify"""
+        with self._applied():
+            errors = []
+            audio_data, params = render_syllable(syllable, errors)
+        if audio_data is None:
+            raise RenderError(errors)
+        # The syllable cache owns audio_data; callers get their own copy
+        return array.array('h', audio_data), params._replace(nframes=len(audio_data))
+    
+    def render_syllable(self, syllable):
+        """Return the spliced and faded audio of one syllable as array('h')"""
+        return self.render_syllable_audio(syllable)[0]
+    
+    def render_syllable_wav(self, syllable):
+        """Return one syllable rendered as WAV file bytes"""
+        f = io.BytesIO()
+        write_wav(f, *self.render_syllable_audio(syllable))
+        return f.getvalue()
+    
+    def render_line_audio(self, line):
+        """Return (audio data, parameters, syllable lengths) of a reclist line such as ka_ki_ku"""
+        with self._applied():
+            errors = []
+            audio_data, params, segment_lengths = render_line_audio(line, line.split('_'), errors)
+        if audio_data is None:
+            raise RenderError(errors)
+        return audio_data, params._replace(nframes=len(audio_data)), segment_lengths
+    
+    def render_line(self, line):
+        """Return the audio of a line such as "ka_ki_ku" as array('h')"""
+        return self.render_line_audio(line)[0]
+    
+    def render_line_wav(self, line):
+        """Return a line rendered as WAV file bytes"""
+        audio_data, params, _ = self.render_line_audio(line)
+        f = io.BytesIO()
+        write_wav(f, audio_data, params)
+        return f.getvalue()
+    
+    def oto_entries(self, line):
+        """Return the oto.ini entries of a line, see line_oto_entries"""
+        audio_data, params, segment_lengths = self.render_line_audio(line)
+        with self._applied():
+            return line_oto_entries(line, segment_lengths, params.framerate)
+    
+    def write_lines(self, lines, sink, oto_entries=None):
+        """Render lines into a sink (DirectorySink, MemorySink, ...), return the error report
+        
+        If oto_entries is a list, the lines' oto.ini entries are appended to it.
+        """
+        error_report = []
+        with self._applied():
+            for line in lines:
+                process_recording_line(line, error_report, oto_entries, sink)
+        return error_report
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate Japanese CVVC recording lines from consonant and vowel samples")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="number of worker processes (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every line even if its sources are unchanged")
+    parser.add_argument('--oto', action='store_true',
+                        help="write oto.ini for the generated lines from the known splice points")
+    parser.add_argument('--package', action='store_true',
+                        help="write the voicebank straight into a zip archive named after the output path")
+    parser.add_argument('--asset-store', action='store_true',
+                        help="decode all sources once into a memory-mapped store shared by workers and runs")
+    parser.add_argument('--normalize', action='store_true',
+                        help="convert sources that are not mono 44100Hz 16-bit (8/24/32-bit, float, stereo, other rates)")
+    parser.add_argument('--analyze', action='store_true',
+                        help="splice each source from its detected onset to its release and place oto.ini values "
+                             "from the vowel's steady state (needs NumPy)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="decode upcoming lines' sources and write finished files on background threads, "
+                             "overlapping disk or network I/O with rendering")
+    parser.add_argument('--profile', action='store_true',
+                        help="record per-stage timings and write a JSON run report")
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help="render every vowel set listed in a JSON batch manifest against one consonant set")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="check all sources and print the render plan without rendering")
+    return parser.parse_args(argv)
+
+def render_bank(args, jobs, executor=None):
+    """Render the pending lines of the current vowel set into output_path, return (successful, failed, up to date)"""
+    started = datetime.now()
+    run_start = time.perf_counter()
+    error_report = []
+    
+    # Skip lines whose sources, settings and output match the build manifest
+    manifest = load_manifest(output_path)
+    settings = dsp_settings()
+    line_sources = {line: line_source_hashes(line) for line in recording_table}
+    if args.force:
+        pending_lines = list(recording_table)
+    else:
+        pending_lines = [line for line in recording_table
+                         if not line_is_up_to_date(line, manifest, settings, line_sources[line])]
+    skipped_count = len(recording_table) - len(pending_lines)
+    if skipped_count:
+        print(f"Skipping {skipped_count} up-to-date lines (use --force to rebuild)")
+    
+    # Process remaining lines in recording table
+    cache_stats = {}
+    asset_stats = {}
+    line_results = {}
+    line_profiles = []
+    line_oto = {}
+    processed_count, error_count = render_lines(pending_lines, error_report, jobs, cache_stats, line_results,
+                                                line_profiles, line_oto, executor, asset_stats=asset_stats)
+    
+    update_manifest(manifest, line_results, settings, line_oto, line_sources)
+    save_manifest(output_path, manifest)
+    
+    # Up-to-date lines contribute the oto.ini entries recorded in the manifest
+    if args.oto:
+        oto_entries = []
+        for line in recording_table:
+            record = manifest['lines'].get(line)
+            if record is not None:
+                oto_entries.extend(record['oto'])
+        oto_file = write_oto_ini(output_path, oto_entries)
+        print(f"oto.ini generated: {oto_file}")
     
     # Generate error report
     generate_error_report(error_report)
     
-    print(f"\nProcessing complete! Successful: {processed_count}, Failed: {error_count}")
+    finish_run(output_path, started, run_start, jobs, (processed_count, error_count, skipped_count),
+               error_report, cache_stats, asset_stats, line_profiles)
+    return processed_count, error_count, skipped_count
+
+def package_path():
+    """Return the zip archive the current vowel set is packaged into"""
+    return output_path.rstrip('/\\') + '.zip'
+
+def package_bank(args, jobs, executor=None):
+    """Render every line of the current vowel set straight into a zip voicebank, return (successful, failed, 0)
+    
+    The archive holds the lines in reclist order, then oto.ini (with --oto),
+    the error report if there were errors, and the checksum list.
+    """
+    started = datetime.now()
+    run_start = time.perf_counter()
+    archive_path = package_path()
+    error_report = []
+    cache_stats = {}
+    asset_stats = {}
+    line_profiles = []
+    line_oto = {}
+    
+    sink = ZipSink(archive_path)
+    try:
+        processed_count, error_count = render_lines(recording_table, error_report, jobs, cache_stats, None,
+                                                    line_profiles, line_oto, executor, sink, asset_stats)
+        if args.oto:
+            oto_entries = [entry for line in recording_table for entry in line_oto.get(line, [])]
+            sink.write(oto_filename, oto_ini_text(oto_entries).encode(oto_encoding))
+        if error_report:
+            # No generation time, so the same sources always give the same archive
+            sink.write(package_error_report_filename, error_report_text(error_report, timestamp=False).encode('utf-8'))
+        sink.finish()
+    except BaseException:
+        sink.abort()
+        raise
+    print(f"\nVoicebank packaged: {archive_path}")
+    if error_report:
+        print(f"Error report: {package_error_report_filename} in the archive")
+    
+    finish_run(os.path.dirname(os.path.abspath(archive_path)), started, run_start, jobs,
+               (processed_count, error_count, None), error_report, cache_stats, asset_stats, line_profiles,
+               package=archive_path)
+    return processed_count, error_count, 0
+
+def abort_on_problems(problems):
+    """Report planning problems in the current output path, return True if there were any"""
+    if not problems:
+        return False
+    for problem in problems:
+        print(f"Warning: {problem}")
+    generate_error_report(list(problems))
+    print(f"\nProcessing aborted: {len(problems)} missing or invalid assets, nothing was rendered")
+    return True
+
+def plan_source_files(plan):
+    """Return every source file referenced by a render plan"""
+    return {f for _, line_plan in plan for _, consonant_file, vowel_file in line_plan
+            for f in (consonant_file, vowel_file) if f}
+
+def load_batch(batch_file):
+    """Load a batch manifest, resolving its paths relative to the manifest's folder
+    
+    The manifest is JSON: {"consonant_path": ..., "banks": [{"name": ...,
+    "vowel_path": ..., "output_path": ...}, ...]}. consonant_path defaults to
+    the one configured at the top of this script.
+    """
+    with open(batch_file, 'r', encoding='utf-8') as f:
+        batch = json.load(f)
+    
+    base_dir = os.path.dirname(os.path.abspath(batch_file))
+    def resolve(path):
+        return os.path.join(base_dir, path)
+    
+    banks = []
+    for i, bank in enumerate(batch.get('banks', [])):
+        if 'vowel_path' not in bank or 'output_path' not in bank:
+            raise ValueError(f"Bank {i + 1} in {batch_file} needs vowel_path and output_path")
+        banks.append({
+            'name': bank.get('name', os.path.basename(os.path.normpath(bank['output_path']))),
+            'vowel_path': resolve(bank['vowel_path']),
+            'output_path': resolve(bank['output_path']),
+        })
+    if not banks:
+        raise ValueError(f"No banks listed in {batch_file}")
+    
+    return {
+        'consonant_path': resolve(batch['consonant_path']) if 'consonant_path' in batch else consonant_path,
+        'banks': banks,
+        'cache_dir': os.path.join(base_dir, cache_dirname),
+    }
+
+def run_batch(batch_file, args, jobs):
+    """Render every vowel set of a batch manifest against one shared consonant set"""
+    global consonant_path, vowel_path, output_path, normalized_cache_dir
+    batch = load_batch(batch_file)
+    consonant_path = batch['consonant_path']
+    if normalize_sources:
+        normalized_cache_dir = os.path.join(batch['cache_dir'], 'normalized')
+    print(f"Starting batch: {len(batch['banks'])} banks, consonants from {consonant_path}")
+    
+    # Scan and check the shared consonants once, then each vowel set
+    build_asset_index(consonant_path)
+    plans = []
+    for bank in batch['banks']:
+        vowel_path = bank['vowel_path']
+        build_asset_index(vowel_path)
+        plans.append(plan_recording_table(recording_table, rescan=False))
+    
+    if args.dry_run:
+        for bank, (plan, problems) in zip(batch['banks'], plans):
+            print(f"\n[{bank['name']}] {bank['vowel_path']} -> {bank['output_path']}")
+            print_plan(plan, problems)
+        return
+    
+    if args.asset_store:
+        source_files = sorted(set().union(*(plan_source_files(plan) for plan, _ in plans)))
+        reused = build_asset_store(batch['cache_dir'], source_files)
+        open_asset_store(batch['cache_dir'])
+        print(f"Asset store: {len(source_files)} sources {'reused' if reused else 'packed'} in {batch['cache_dir']}")
+    
+    # One worker pool for the whole batch keeps the consonants decoded across banks
+    executor = create_executor(jobs) if jobs > 1 else None
+    totals = [0, 0, 0]
+    aborted = []
+    try:
+        for bank, (plan, problems) in zip(batch['banks'], plans):
+            vowel_path = bank['vowel_path']
+            output_path = bank['output_path']
+            print(f"\n[{bank['name']}] Rendering {vowel_path} -> {package_path() if args.package else output_path}")
+            if abort_on_problems(problems):
+                aborted.append(bank['name'])
+                continue
+            if args.package:
+                counts = package_bank(args, jobs, executor)
+            else:
+                os.makedirs(output_path, exist_ok=True)
+                counts = render_bank(args, jobs, executor)
+            for i, count in enumerate(counts):
+                totals[i] += count
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    
+    print(f"\nBatch complete! Banks: {len(batch['banks']) - len(aborted)} rendered, {len(aborted)} aborted. "
+          f"Lines successful: {totals[0]}, failed: {totals[1]}, up to date: {totals[2]}")
+    if aborted:
+        print(f"Aborted banks (see their error reports): {', '.join(aborted)}")
+
+def main(argv=None):
+    """Main function"""
+    global profiling_enabled, normalize_sources, normalized_cache_dir, splice_analysis, pipeline_io
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    profiling_enabled = args.profile
+    pipeline_io = args.pipeline
+    normalize_sources = args.normalize
+    splice_analysis = args.analyze
+    if splice_analysis and np is None:
+        print("Warning: --analyze needs NumPy; splicing the whole sources instead")
+    
+    if args.batch:
+        run_batch(args.batch, args, jobs)
+        return
+    
+    print("Starting audio concatenation...")
+    if normalize_sources:
+        normalized_cache_dir = os.path.join(output_path, cache_dirname, 'normalized')
+    
+    # Resolve and validate every asset before any audio work
+    plan, problems = plan_recording_table(recording_table)
+    if args.dry_run:
+        print_plan(plan, problems)
+        return
+    if abort_on_problems(problems):
+        return
+    
+    if args.asset_store:
+        store_dir = os.path.join(output_path, cache_dirname)
+        source_files = sorted(plan_source_files(plan))
+        reused = build_asset_store(store_dir, source_files)
+        open_asset_store(store_dir)
+        print(f"Asset store: {len(source_files)} sources {'reused' if reused else 'packed'} in {store_dir}")
+    
+    if args.package:
+        package_bank(args, jobs)
+    else:
+        os.makedirs(output_path, exist_ok=True)
+        render_bank(args, jobs)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,254 @@
+# Benchmark for the ajpncvvc.py concatenation pipeline
+# Builds synthetic mono 16-bit 44100Hz consonant/vowel sets, times each stage
+# and compares the results with a stored baseline
+
+import os
+import io
+import sys
+import json
+import math
+import time
+import wave
+import array
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+import ajpncvvc
+
+SAMPLE_RATE = 44100
+
+# Stages in report order
+STAGES = [
+    'read_wav',
+    'apply_cosine_fadeout',
+    'cosine_crossfade_segments',
+    'concatenate_audio',
+    'process_recording_line',
+    'main',
+]
+
+def synthetic_audio(length, seed, voiced=True):
+    """Create deterministic test audio: a sine with light noise for vowels, decaying noise for consonants"""
+    rng = random.Random(seed)
+    frequency = 110 + (seed % 7) * 30
+    samples = array.array('h', bytes(2 * length))
+    for i in range(length):
+        if voiced:
+            value = 12000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE) + rng.uniform(-300, 300)
+        else:
+            value = rng.uniform(-8000, 8000) * (1 - i / length)
+        samples[i] = int(value)
+    return samples
+
+def consonant_names(count):
+    """Return count consonant names, starting with the ones used by the real reclist"""
+    names = []
+    for line in ajpncvvc.recording_table:
+        for syllable in line.split('_'):
+            consonant, _ = ajpncvvc.parse_syllable(syllable)
+            if consonant and consonant not in names:
+                names.append(consonant)
+
+    # Invent further consonants when more are requested than the reclist uses
+    letters = 'bcdfghjklmpqrstvwxz'
+    i = 0
+    while len(names) < count:
+        name = 'q' + letters[i % len(letters)] + letters[i // len(letters) % len(letters)]
+        if name not in names:
+            names.append(name)
+        i += 1
+    return names[:count]
+
+def write_source(file_path, samples):
+    """Write a mono 16-bit 44100Hz WAV file"""
+    with wave.open(file_path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.tobytes())
+
+def create_voice_set(root, consonant_count, consonant_ms, vowel_ms):
+    """Create consonant and vowel folders under root, return (consonant folder, vowel folder, reclist)"""
+    consonant_dir = os.path.join(root, 'consonants')
+    vowel_dir = os.path.join(root, 'vowels')
+    os.makedirs(consonant_dir)
+    os.makedirs(vowel_dir)
+
+    for seed, vowel in enumerate(ajpncvvc.vowels):
+        samples = synthetic_audio(int(SAMPLE_RATE * vowel_ms / 1000), seed)
+        write_source(os.path.join(vowel_dir, f"{vowel}.wav"), samples)
+
+    names = consonant_names(consonant_count)
+    for seed, name in enumerate(names):
+        samples = synthetic_audio(int(SAMPLE_RATE * consonant_ms / 1000), seed, voiced=False)
+        write_source(os.path.join(consonant_dir, f"{name}-.wav"), samples)
+
+    # One vowel line plus one line per consonant (CV with every vowel except n)
+    reclist = ['_'.join(ajpncvvc.vowels)]
+    for name in names:
+        reclist.append('_'.join(name + vowel for vowel in ajpncvvc.vowels if vowel != 'n'))
+
+    return consonant_dir, vowel_dir, reclist
+
+def reset_caches():
+    """Drop every cache so each repeat measures a cold run"""
+    ajpncvvc.clear_caches()
+
+def time_stage(function, repeat):
+    """Run function repeat times, return the best wall time in seconds"""
+    best = None
+    for _ in range(repeat):
+        reset_caches()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_benchmarks(consonant_dir, vowel_dir, output_dir, reclist, repeat, jobs):
+    """Time every stage, return {stage: {'seconds', 'samples', 'lines'}}"""
+    ajpncvvc.consonant_path = consonant_dir
+    ajpncvvc.vowel_path = vowel_dir
+    ajpncvvc.output_path = output_dir
+    ajpncvvc.recording_table = reclist
+
+    source_files = sorted(
+        [os.path.join(consonant_dir, name) for name in os.listdir(consonant_dir)] +
+        [os.path.join(vowel_dir, name) for name in os.listdir(vowel_dir)])
+    sources = {file_path: ajpncvvc.read_wav(file_path)[0] for file_path in source_files}
+    vowel_audio = [sources[os.path.join(vowel_dir, f"{vowel}.wav")] for vowel in ajpncvvc.vowels]
+    consonant_audio = [sources[f] for f in source_files if f.startswith(consonant_dir)]
+    syllable_pairs = [(c, v) for c in consonant_audio for v in vowel_audio]
+
+    stages = {}
+
+    def read_all():
+        for file_path in source_files:
+            ajpncvvc.read_wav(file_path)
+    stages['read_wav'] = (read_all, sum(len(a) for a in sources.values()), 0)
+
+    def fade_all():
+        for consonant, vowel in syllable_pairs:
+            ajpncvvc.apply_cosine_fadeout(vowel, ajpncvvc.syllable_fade_fraction)
+    stages['apply_cosine_fadeout'] = (fade_all, sum(len(v) for _, v in syllable_pairs), 0)
+
+    def crossfade_all():
+        for consonant, vowel in syllable_pairs:
+            ajpncvvc.cosine_crossfade_segments(vowel, vowel, ajpncvvc.line_crossfade_fraction)
+    stages['cosine_crossfade_segments'] = (crossfade_all, sum(2 * len(v) for _, v in syllable_pairs), 0)
+
+    def concatenate_all():
+        for consonant, vowel in syllable_pairs:
+            ajpncvvc.concatenate_audio(consonant, vowel, None)
+    stages['concatenate_audio'] = (concatenate_all, sum(len(c) + len(v) for c, v in syllable_pairs), 0)
+
+    def line_output_samples():
+        total = 0
+        for line in reclist:
+            with wave.open(os.path.join(output_dir, f"{line}.wav"), 'rb') as wav_file:
+                total += wav_file.getnframes()
+        return total
+
+    def process_all():
+        error_report = []
+        for line in reclist:
+            ajpncvvc.process_recording_line(line, error_report)
+        if error_report:
+            raise RuntimeError(f"Benchmark lines failed: {error_report[0]}")
+
+    def run_main():
+        ajpncvvc.main(['--force', '--jobs', str(jobs)])
+
+    report = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for stage, (function, samples, lines) in stages.items():
+            report[stage] = {'seconds': time_stage(function, repeat), 'samples': samples, 'lines': lines}
+        report['process_recording_line'] = {'seconds': time_stage(process_all, repeat), 'lines': len(reclist)}
+        report['process_recording_line']['samples'] = line_output_samples()
+        report['main'] = {'seconds': time_stage(run_main, repeat), 'lines': len(reclist),
+                          'samples': report['process_recording_line']['samples']}
+
+    return report
+
+def add_rates(report):
+    """Add samples per second and lines per second to each stage"""
+    for result in report.values():
+        seconds = max(result['seconds'], 1e-9)
+        result['samples_per_sec'] = result['samples'] / seconds
+        result['lines_per_sec'] = result['lines'] / seconds if result['lines'] else None
+
+def compare_with_baseline(report, baseline, threshold):
+    """Return the stages whose sample throughput fell more than threshold below the baseline"""
+    regressions = []
+    for stage in STAGES:
+        if stage not in baseline or stage not in report:
+            continue
+        baseline_rate = baseline[stage]['samples_per_sec']
+        current_rate = report[stage]['samples_per_sec']
+        if current_rate < baseline_rate * (1 - threshold):
+            regressions.append(f"{stage}: {current_rate:,.0f} samples/s, baseline {baseline_rate:,.0f} samples/s "
+                               f"({(1 - current_rate / baseline_rate) * 100:.1f}% slower)")
+    return regressions
+
+def print_report(report):
+    """Print a table of stage timings"""
+    print(f"{'Stage':<28}{'Time (s)':>12}{'Samples/s':>16}{'Lines/s':>12}")
+    for stage in STAGES:
+        result = report[stage]
+        lines_per_sec = f"{result['lines_per_sec']:.1f}" if result['lines_per_sec'] else "-"
+        print(f"{stage:<28}{result['seconds']:>12.4f}{result['samples_per_sec']:>16,.0f}{lines_per_sec:>12}")
+
+def main(argv=None):
+    """Run the benchmark, return the process exit code"""
+    parser = argparse.ArgumentParser(description="Benchmark the ajpncvvc.py pipeline on synthetic voice data")
+    parser.add_argument('--consonants', type=int, default=20, help="number of synthetic consonants (default 20)")
+    parser.add_argument('--consonant-ms', type=float, default=150, help="length of each consonant in ms (default 150)")
+    parser.add_argument('--vowel-ms', type=float, default=600, help="length of each vowel in ms (default 600)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage, the best is reported (default 3)")
+    parser.add_argument('--jobs', type=int, default=1, help="worker processes for the main() stage (default 1)")
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help="baseline file to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed slowdown before a stage fails, as a fraction (default 0.2)")
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix='ajpncvvc_bench_')
+    try:
+        consonant_dir, vowel_dir, reclist = create_voice_set(root, args.consonants, args.consonant_ms, args.vowel_ms)
+        output_dir = os.path.join(root, 'output')
+        os.makedirs(output_dir)
+        report = run_benchmarks(consonant_dir, vowel_dir, output_dir, reclist, args.repeat, args.jobs)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    add_rates(report)
+    print(f"{args.consonants} consonants, {len(reclist)} lines, NumPy {'on' if ajpncvvc.numpy_enabled() else 'off'}\n")
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(report, baseline, args.threshold)
+    if regressions:
+        print(f"\nPerformance regressions (threshold {args.threshold * 100:.0f}%):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print(f"\nNo stage is more than {args.threshold * 100:.0f}% slower than {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,25 +2,108 @@
 # Fixes incorrect romaji notations and corresponding hiragana characters
 
 import os
+import io
 import re
+import sys
+import codecs
+import shutil
+import argparse
+import contextlib
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
-def detect_encoding(file_path):
+# Encodings tried in order when detecting the encoding of an oto.ini
+encodings = ['shift_jis', 'cp932', 'euc_jp', 'utf-8', 'gbk', 'big5']
+
+# oto.ini files are read in buffers of this size; the encoding is detected from the first non-ASCII one
+read_buffer_size = 1024 * 1024
+
+# Line breaks recognized in oto.ini files
+newline_pattern = re.compile(r'\r\n|\r|\n')
+
+# Trailing digits of aliases such as 'jya1'
+trailing_digits_pattern = re.compile(r'\d+$')
+
+# Common patterns for garbled Japanese text (likely mojibake)
+garbled_patterns = ('•Ű', '§', 'ů', '™', '®', '¶', 'Ę')
+
+# Romaji map, correction map and romaji trie, built on first use
+_fixer_tables = None
+
+# One oto.ini entry as returned by OtoTable.entry()
+OtoEntry = namedtuple('OtoEntry', 'wav_file alias offset consonant cutoff preutterance overlap')
+
+def detect_buffer_encoding(data, final=True):
     """
-    Detect file encoding by trying common encodings
+    Decode a buffer with each common encoding until one succeeds
+    Returns (encoding, incremental decoder, decoded text), or None if no encoding works;
+    the decoder keeps an incomplete trailing character for the next buffer
     """
-    encodings = ['shift_jis', 'cp932', 'euc_jp', 'utf-8', 'gbk', 'big5']
-    
     for encoding in encodings:
+        decoder = codecs.getincrementaldecoder(encoding)()
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                f.read()
-            return encoding
+            text = decoder.decode(data, final)
         except UnicodeDecodeError:
             continue
+        return encoding, decoder, text
     
     # If no encoding works, return None
     return None
 
+def detect_encoding(file_path):
+    """
+    Detect file encoding from the first buffer of the file
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read(read_buffer_size)
+    detected = detect_buffer_encoding(data, len(data) < read_buffer_size)
+    return detected[0] if detected is not None else None
+
+def decode_lines(f, detected=None, keepends=False):
+    """
+    Decode an open binary file once, buffer by buffer, and yield its lines (with their line breaks if keepends)
+    The encoding is detected from the first buffer that is not plain ASCII, which decodes the same
+    in every candidate encoding, and stored in detected['encoding'] if a dict is given (None if no
+    encoding works). Undecodable bytes after that buffer, or anywhere if no encoding was detected,
+    are replaced with U+FFFD; decoding falls back to Shift-JIS
+    """
+    decoder = None
+    pending = ''
+    final = False
+    while not final:
+        data = f.read(read_buffer_size)
+        final = len(data) < read_buffer_size
+        if decoder is None and (final or not data.isascii()):
+            result = detect_buffer_encoding(data, final)
+            if result is None:
+                encoding = None
+                decoder = codecs.getincrementaldecoder('shift_jis')(errors='replace')
+                text = decoder.decode(data, final)
+            else:
+                encoding, decoder, text = result
+                decoder.errors = 'replace'
+            if detected is not None:
+                detected['encoding'] = encoding
+            pending += text
+        elif decoder is None:
+            pending += data.decode('ascii')
+        else:
+            pending += decoder.decode(data, final)
+        
+        # A '\r' at the end of the buffer may be the first half of '\r\n'
+        held = '\r' if not final and pending.endswith('\r') else ''
+        text = pending[:len(pending) - len(held)]
+        start = 0
+        for match in newline_pattern.finditer(text):
+            yield text[start:match.end() if keepends else match.start()]
+            start = match.end()
+        # The last part may continue in the next buffer
+        pending = text[start:] + held
+    
+    if pending:
+        yield pending
+
 def create_romaji_to_hiragana_map():
     """
     Create mapping from romaji to hiragana characters
@@ -114,6 +197,54 @@ def create_romaji_correction_map():
     }
     return corrections
 
+def build_romaji_trie(romaji_map):
+    """
+    Build a character trie of the romaji in romaji_map for longest-match lookups
+    Each node maps a character to the next node; the key '' holds the romaji ending at that node
+    """
+    trie = {}
+    for romaji in romaji_map:
+        node = trie
+        for char in romaji:
+            node = node.setdefault(char, {})
+        node[''] = romaji
+    return trie
+
+def find_longest_romaji(text, romaji_trie):
+    """
+    Return the longest romaji of the trie found anywhere in text, the leftmost one on ties, or None
+    """
+    best = None
+    for start in range(len(text)):
+        node = romaji_trie
+        for char in text[start:]:
+            node = node.get(char)
+            if node is None:
+                break
+            romaji = node.get('')
+            if romaji is not None and (best is None or len(romaji) > len(best)):
+                best = romaji
+    return best
+
+def get_fixer_tables():
+    """
+    Return (romaji map, correction map, romaji trie), built once per process
+    """
+    global _fixer_tables
+    if _fixer_tables is None:
+        romaji_map = create_romaji_to_hiragana_map()
+        _fixer_tables = (romaji_map, create_romaji_correction_map(), build_romaji_trie(romaji_map))
+    return _fixer_tables
+
+def default_romaji_trie(romaji_map):
+    """
+    Return the trie of romaji_map, reusing the one built by get_fixer_tables() for the standard map
+    """
+    default_map, _, default_trie = get_fixer_tables()
+    if romaji_map is default_map or romaji_map == default_map:
+        return default_trie
+    return build_romaji_trie(romaji_map)
+
 def extract_base_romaji(romaji_string):
     """
     Extract base romaji from string that may contain numbers or other suffixes
@@ -122,7 +253,7 @@ def extract_base_romaji(romaji_string):
     # Remove numbers and spaces, split by space and take first part
     base = romaji_string.split()[0] if ' ' in romaji_string else romaji_string
     # Remove trailing numbers
-    base = re.sub(r'\d+$', '', base)
+    base = trailing_digits_pattern.sub('', base)
     return base
 
 def correct_romaji(romaji_string, correction_map):
@@ -148,13 +279,12 @@ def is_hiragana_garbled(text):
     """
     Check if text contains garbled hiragana characters (likely mojibake)
     """
-    # Common patterns for garbled Japanese text
-    garbled_patterns = ['•Ű', '§', 'ů', '™', '®', '¶', 'Ę']
     return any(pattern in text for pattern in garbled_patterns)
 
-def fix_oto_line(line, romaji_map, correction_map):
+def fix_oto_line(line, romaji_map, correction_map, romaji_trie=None):
     """
     Fix a single line from oto.ini file
+    romaji_trie is build_romaji_trie(romaji_map); the one from get_fixer_tables() is used if not given
     """
     if '=' not in line:
         return line
@@ -165,8 +295,16 @@ def fix_oto_line(line, romaji_map, correction_map):
     if len(param_parts) < 6:
         return line
     
-    romaji_field = param_parts[0]
+    param_parts[0] = fix_alias(filename, param_parts[0], romaji_map, correction_map, romaji_trie)
     
+    # Reconstruct the line
+    fixed_params = ','.join(param_parts)
+    return f"{filename}={fixed_params}"
+
+def fix_alias(filename, romaji_field, romaji_map, correction_map, romaji_trie=None):
+    """
+    Return the fixed alias of an oto.ini entry
+    """
     # Check if this is a romaji line or hiragana line
     if is_hiragana_garbled(romaji_field):
         # This is a hiragana line - we need to find the correct hiragana
@@ -175,85 +313,462 @@ def fix_oto_line(line, romaji_map, correction_map):
         corrected_romaji = correct_romaji(base_romaji, correction_map)
         
         if corrected_romaji in romaji_map:
-            param_parts[0] = romaji_map[corrected_romaji]
-        else:
-            # If we can't map it, try to extract from filename
-            for known_romaji in romaji_map:
-                if known_romaji in filename.lower():
-                    param_parts[0] = romaji_map[known_romaji]
-                    break
+            return romaji_map[corrected_romaji]
+        
+        # If we can't map it, use the longest known romaji in the filename (without extension)
+        if romaji_trie is None:
+            romaji_trie = default_romaji_trie(romaji_map)
+        known_romaji = find_longest_romaji(os.path.splitext(filename)[0].lower(), romaji_trie)
+        if known_romaji is not None:
+            return romaji_map[known_romaji]
+        return romaji_field
     
-    else:
-        # This is a romaji line - correct the romaji
-        corrected_romaji = correct_romaji(romaji_field, correction_map)
-        param_parts[0] = corrected_romaji
+    # This is a romaji line - correct the romaji
+    return correct_romaji(romaji_field, correction_map)
+
+def format_oto_value(value):
+    """
+    Format an oto.ini time value: whole numbers without a decimal point, others as short as possible
+    """
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+class OtoTable:
+    """
+    oto.ini entries with parsed columns and indexes by alias and by WAV file
+    Entry i is wav_files[i], aliases[i] and the time columns (array('d'), NaN where a value is
+    missing or not a number). The original text of every line is kept as well, including lines
+    that are not entries, so write() reproduces the file byte for byte except for the fields
+    changed with set(); unchanged fields of a changed entry, numbers that do not parse
+    included, are written back as they were
+    """
+    value_fields = ('offset', 'consonant', 'cutoff', 'preutterance', 'overlap')
     
-    # Reconstruct the line
-    fixed_params = ','.join(param_parts)
-    return f"{filename}={fixed_params}"
+    def __init__(self, lines=(), encoding='utf-8', newline='\n', final_newline=False):
+        self.encoding = encoding
+        self.newline = newline
+        self.final_newline = final_newline
+        self.lines = []
+        # Line breaks that differ from newline, by line number
+        self.newlines = {}
+        # Lines holding bytes that could not be decoded (U+FFFD)
+        self.undecodable = set()
+        self.entry_lines = array('l')
+        self.wav_files = []
+        self.aliases = []
+        self.columns = {field: array('d') for field in self.value_fields}
+        self.alias_index = {}
+        self.wav_index = {}
+        # Changed fields by entry index
+        self.changed = {}
+        for line in lines:
+            self.append_line(line)
+    
+    @classmethod
+    def read(cls, file_path):
+        """
+        Read an oto.ini, keeping its encoding and the line break of every line
+        """
+        detected = {}
+        table = cls(encoding=None)
+        newline = None
+        line_break = ''
+        with open(file_path, 'rb') as f:
+            for line in decode_lines(f, detected, keepends=True):
+                text = line.rstrip('\r\n')
+                line_break = line[len(text):]
+                line_number = len(table.lines)
+                table.append_line(text)
+                if '\ufffd' in text:
+                    table.undecodable.add(line_number)
+                if not line_break:
+                    continue
+                if newline is None:
+                    # The first line break is the file's style; only the last line can come before it
+                    newline = line_break
+                elif line_break != newline:
+                    table.newlines[line_number] = line_break
+        table.newline = newline or '\n'
+        table.final_newline = bool(line_break)
+        # Files that match no encoding were read as Shift-JIS
+        table.encoding = detected.get('encoding') or 'shift_jis'
+        return table
+    
+    def append_line(self, line):
+        """
+        Add a line of oto.ini text; lines that are not entries are kept as they are
+        """
+        line_number = len(self.lines)
+        self.lines.append(line)
+        if '=' not in line:
+            return
+        wav_file, params = line.split('=', 1)
+        param_parts = params.split(',')
+        if len(param_parts) < 6:
+            return
+        
+        index = len(self.aliases)
+        self.entry_lines.append(line_number)
+        self.wav_files.append(sys.intern(wav_file))
+        self.aliases.append(param_parts[0])
+        for field, text in zip(self.value_fields, param_parts[1:]):
+            try:
+                value = float(text)
+            except ValueError:
+                value = float('nan')
+            self.columns[field].append(value)
+        self.alias_index.setdefault(param_parts[0], []).append(index)
+        self.wav_index.setdefault(wav_file, []).append(index)
+    
+    def __len__(self):
+        return len(self.aliases)
+    
+    def entry(self, index):
+        """
+        Return entry index as an OtoEntry
+        """
+        return OtoEntry(self.wav_files[index], self.aliases[index],
+                        *(self.columns[field][index] for field in self.value_fields))
+    
+    def find(self, alias):
+        """
+        Return the indexes of the entries with this alias
+        """
+        return list(self.alias_index.get(alias, ()))
+    
+    def entries_for(self, wav_file):
+        """
+        Return the indexes of the entries of this WAV file
+        """
+        return list(self.wav_index.get(wav_file, ()))
+    
+    def duplicates(self):
+        """
+        Return {alias: entry indexes} for every alias defined more than once
+        """
+        return {alias: list(indexes) for alias, indexes in self.alias_index.items() if len(indexes) > 1}
+    
+    def collisions(self):
+        """
+        Return {alias: entry indexes} for aliases defined on more than one WAV file;
+        UTAU only uses the first of them
+        """
+        return {alias: indexes for alias, indexes in self.duplicates().items()
+                if len({self.wav_files[index] for index in indexes}) > 1}
+    
+    def set(self, index, **fields):
+        """
+        Change fields of an entry (wav_file, alias or a time field), keeping the indexes up to date
+        """
+        for field, value in fields.items():
+            if field in ('wav_file', 'alias'):
+                values = self.wav_files if field == 'wav_file' else self.aliases
+                index_map = self.wav_index if field == 'wav_file' else self.alias_index
+                if values[index] == value:
+                    continue
+                index_map[values[index]].remove(index)
+                if not index_map[values[index]]:
+                    del index_map[values[index]]
+                # Keep each index list in file order
+                indexes = index_map.setdefault(value, [])
+                indexes.append(index)
+                indexes.sort()
+                values[index] = value
+            elif field in self.columns:
+                self.columns[field][index] = value
+            else:
+                raise ValueError(f"Unknown oto.ini field: {field}")
+            self.changed.setdefault(index, set()).add(field)
+    
+    def fix_aliases(self):
+        """
+        Apply the romaji and garbled hiragana fixes to every alias, return the number of entries changed
+        """
+        romaji_map, correction_map, romaji_trie = get_fixer_tables()
+        changed_count = 0
+        for index, alias in enumerate(self.aliases):
+            fixed_alias = fix_alias(self.wav_files[index], alias, romaji_map, correction_map, romaji_trie)
+            if fixed_alias != alias:
+                self.set(index, alias=fixed_alias)
+                changed_count += 1
+        return changed_count
+    
+    def format_entry(self, index):
+        """
+        Return the oto.ini line of an entry: its original text with the changed fields replaced
+        """
+        wav_file, params = self.lines[self.entry_lines[index]].split('=', 1)
+        param_parts = params.split(',')
+        changed_fields = self.changed.get(index, ())
+        if 'wav_file' in changed_fields:
+            wav_file = self.wav_files[index]
+        if 'alias' in changed_fields:
+            param_parts[0] = self.aliases[index]
+        for position, field in enumerate(self.value_fields, 1):
+            if field in changed_fields:
+                value = self.columns[field][index]
+                param_parts[position] = '' if value != value else format_oto_value(value)
+        return f"{wav_file}={','.join(param_parts)}"
+    
+    def iter_lines(self):
+        """
+        Yield the text of every line with its line break; only changed entries are formatted again
+        """
+        changed_lines = {self.entry_lines[index]: index for index in self.changed}
+        last_line = len(self.lines) - 1
+        for line_number, line in enumerate(self.lines):
+            index = changed_lines.get(line_number)
+            if index is not None:
+                line = self.format_entry(index)
+            if line_number < last_line or self.final_newline:
+                line += self.newlines.get(line_number, self.newline)
+            yield line_number, line
+    
+    def write(self, file_path, encoding=None, lossy=False):
+        """
+        Write the table in its original order, line breaks and encoding (or the given one)
+        The file is written to a temporary file, synced and renamed over file_path.
+        Raises ValueError instead of writing if a line holds bytes that could not be decoded or
+        text the encoding cannot represent, unless lossy is set (they are then replaced).
+        Returns the number of changed entries written
+        """
+        encoding = encoding or self.encoding
+        temp_path = file_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                for line_number, line in self.iter_lines():
+                    if line_number in self.undecodable and not lossy:
+                        raise ValueError(f"Line {line_number + 1} of the original could not be decoded "
+                                         f"and would not be written back unchanged")
+                    try:
+                        data = line.encode(encoding)
+                    except UnicodeEncodeError:
+                        if not lossy:
+                            raise ValueError(f"Line {line_number + 1} cannot be written in {encoding}: "
+                                             f"{line.rstrip()}")
+                        data = line.encode(encoding, errors='replace')
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+            sync_directory(file_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        
+        # The written text is the new original
+        changed_count = len(self.changed)
+        for index in self.changed:
+            self.lines[self.entry_lines[index]] = self.format_entry(index)
+        self.changed.clear()
+        self.encoding = encoding
+        return changed_count
+
+def sync_directory(file_path):
+    """
+    Flush the directory entry of file_path to disk, so a rename survives a crash
+    Skipped on Windows, which cannot open directories, and where the file system does not support it
+    """
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(file_path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def backup_file(file_path, backup_path):
+    """
+    Keep the current contents of file_path at backup_path without removing file_path
+    """
+    if os.path.exists(backup_path):
+        os.remove(backup_path)
+    try:
+        # A hard link costs no copy; the original keeps its contents when the file is replaced
+        os.link(file_path, backup_path)
+    except OSError:
+        shutil.copy2(file_path, backup_path)
 
 def fix_oto_file(file_path):
     """
     Main function to fix oto.ini file
+    The file is read, fixed and written line by line, so memory use does not grow with its size.
+    The fixed file is written to a temporary file, synced to disk and renamed over the original,
+    so oto.ini is always either the old or the new version. Files whose text would not change are
+    left alone in their own encoding and line breaks.
+    Returns a summary: {'file', 'status' ('fixed', 'unchanged' or 'error'), 'lines', 'changed', 'encoding'}
     """
-    romaji_map = create_romaji_to_hiragana_map()
-    correction_map = create_romaji_correction_map()
+    romaji_map, correction_map, romaji_trie = get_fixer_tables()
+    result = {'file': file_path, 'status': 'error', 'lines': 0, 'changed': 0, 'encoding': None}
+    
+    # Fixed lines go to a temporary file next to the original
+    temp_path = file_path + '.tmp'
+    fixed_count = 0
+    detected = {}
+    # Whether the written text differs from the decoded original, besides its line breaks
+    text_changed = False
+    try:
+        with open(file_path, 'rb') as source, open(temp_path, 'w', encoding='utf-8') as target:
+            # Decode once, detecting the encoding on the way, and process each line
+            for line in decode_lines(source, detected):
+                stripped_line = line.strip()
+                if not stripped_line or stripped_line != line:
+                    # Surrounding whitespace and blank lines are dropped
+                    text_changed = True
+                line = stripped_line
+                if line:
+                    fixed_line = fix_oto_line(line, romaji_map, correction_map, romaji_trie)
+                    target.write(fixed_line if fixed_count == 0 else '\n' + fixed_line)
+                    fixed_count += 1
+                    if fixed_line != line:
+                        result['changed'] += 1
+                        text_changed = True
+            target.flush()
+            os.fsync(target.fileno())
+    except Exception as e:
+        print(f"Error fixing file: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return result
     
-    # Detect file encoding
-    encoding = detect_encoding(file_path)
+    encoding = detected.get('encoding')
     if encoding is None:
         print("Error: Could not detect file encoding. Trying with error handling...")
         encoding = 'shift_jis'  # Default to Shift-JIS for Japanese files
-    
     print(f"Detected encoding: {encoding}")
+    result['lines'] = fixed_count
+    result['encoding'] = encoding
     
-    # Read the original file with detected encoding
-    try:
-        with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-            lines = f.readlines()
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        return
-    
-    # Process each line
-    fixed_lines = []
-    for line in lines:
-        line = line.strip()
-        if line:
-            fixed_line = fix_oto_line(line, romaji_map, correction_map)
-            fixed_lines.append(fixed_line)
+    # Leave files that are already fixed untouched, even if they are not UTF-8
+    if not text_changed:
+        os.remove(temp_path)
+        result['status'] = 'unchanged'
+        print(f"oto.ini is already fixed, nothing written: {file_path}")
+        return result
     
-    # Create backup and write fixed file
+    # Create backup and move the fixed file into place
     backup_path = file_path + '.bak'
     try:
-        os.rename(file_path, backup_path)
+        backup_file(file_path, backup_path)
     except Exception as e:
         print(f"Error creating backup: {e}")
-        return
+        os.remove(temp_path)
+        return result
     
-    # Write fixed file with UTF-8 encoding
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(fixed_lines))
+        os.replace(temp_path, file_path)
+        sync_directory(file_path)
     except Exception as e:
         print(f"Error writing fixed file: {e}")
-        # Restore backup if write fails
+        # The original is still in place
         try:
-            os.rename(backup_path, file_path)
-            print("Restored original file due to write error")
-        except:
+            os.remove(temp_path)
+        except OSError:
             pass
-        return
+        return result
     
+    result['status'] = 'fixed'
     print(f"Fixed oto.ini file. Backup created at: {backup_path}")
-    print(f"Fixed {len(fixed_lines)} lines.")
+    print(f"Fixed {fixed_count} lines.")
+    return result
+
+def find_oto_files(root):
+    """
+    Find every oto.ini under a voicebank folder, including pitch subfolders, in a stable order
+    """
+    oto_files = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.lower() == 'oto.ini':
+                oto_files.append(os.path.join(directory, name))
+    return oto_files
+
+def _fix_file_task(file_path):
+    """
+    Fix one oto.ini in a worker process, return its summary and console output
+    """
+    console = io.StringIO()
+    with contextlib.redirect_stdout(console):
+        result = fix_oto_file(file_path)
+    return result, console.getvalue()
+
+def fix_oto_files(file_paths, jobs=1):
+    """
+    Fix several oto.ini files, across worker processes if jobs > 1, return their summaries in order
+    """
+    if jobs > 1 and len(file_paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            outcomes = list(executor.map(_fix_file_task, file_paths))
+    else:
+        outcomes = (_fix_file_task(file_path) for file_path in file_paths)
+    
+    results = []
+    for file_path, (result, console_output) in zip(file_paths, outcomes):
+        print(f"[{file_path}]")
+        print(console_output, end='')
+        results.append(result)
+    return results
+
+def print_summary(results):
+    """
+    Print the lines changed per file
+    """
+    print(f"\n{'Status':<10}{'Lines':>8}{'Changed':>9}  File")
+    for result in results:
+        print(f"{result['status']:<10}{result['lines']:>8}{result['changed']:>9}  {result['file']}")
+    counts = {status: sum(1 for result in results if result['status'] == status)
+              for status in ('fixed', 'unchanged', 'error')}
+    print(f"\n{len(results)} files: {counts['fixed']} fixed, {counts['unchanged']} unchanged, {counts['error']} failed; "
+          f"{sum(result['changed'] for result in results)} lines changed")
+
+def main(default_path, argv=None):
+    """
+    Fix the oto.ini files given on the command line, or default_path if none are given
+    """
+    parser = argparse.ArgumentParser(description="Fix romaji and garbled hiragana aliases in oto.ini files")
+    parser.add_argument('paths', nargs='*',
+                        help="oto.ini files or voicebank folders searched for oto.ini (default: oto_file_path)")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="number of worker processes (0 = one per CPU core)")
+    args = parser.parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    
+    file_paths = []
+    for path in args.paths or [default_path]:
+        if os.path.isdir(path):
+            found = find_oto_files(path)
+            if not found:
+                print(f"No oto.ini found under: {path}")
+            file_paths.extend(found)
+        elif os.path.exists(path):
+            file_paths.append(path)
+        else:
+            print(f"File not found: {path}")
+            print("Please check the file path and try again.")
+    # A file listed twice must not be fixed by two workers at once
+    unique_paths = {}
+    for path in file_paths:
+        unique_paths.setdefault(os.path.abspath(path), path)
+    file_paths = list(unique_paths.values())
+    if not file_paths:
+        return
+    
+    results = fix_oto_files(file_paths, jobs)
+    print_summary(results)
 
 # Main execution
 if __name__ == "__main__":
     oto_file_path = r"this\is\YOUR\oto.ini"
-    
-    if os.path.exists(oto_file_path):
-        fix_oto_file(oto_file_path)
-    else:
-        print(f"File not found: {oto_file_path}")
-        print("Please check the file path and try again.")
\ No newline at end of file
+    main(oto_file_path)
\ No newline at end of file
@@ -0,0 +1,206 @@
+# Local preview server for ajpncvvc.py
+# Keeps the consonant and vowel sources decoded in memory and renders single
+# recording lines or syllables on request, so a changed consonant can be heard
+# without a full script run
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ajpncvvc
+
+# Request latencies kept per endpoint for the metrics
+LATENCY_WINDOW = 1000
+
+def source_state(path):
+    """
+    Return the file names, modification times and sizes of a source folder, or the stat of a zip archive
+    """
+    try:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        state = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    state.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(state))
+    except OSError:
+        return None
+
+def percentile(values, fraction):
+    """
+    Return the value at fraction (0-1) of the sorted values
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class PreviewService:
+    """
+    A warm Renderer plus source change detection and request metrics
+    """
+    def __init__(self, consonant_path, vowel_path):
+        self.source_paths = (os.path.abspath(consonant_path), os.path.abspath(vowel_path))
+        self.renderer = ajpncvvc.Renderer(*self.source_paths)
+        self.source_states = [source_state(path) for path in self.source_paths]
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.refreshes = 0
+        self.dropped_entries = 0
+        self.requests = {}
+        self.latencies = {}
+        self.server_errors = 0
+
+    def check_sources(self):
+        """
+        Rescan the sources and drop stale cache entries if any source file changed on disk
+        """
+        states = [source_state(path) for path in self.source_paths]
+        with self.lock:
+            if states == self.source_states:
+                return
+            self.source_states = states
+            self.refreshes += 1
+        dropped = self.renderer.refresh()
+        with self.lock:
+            self.dropped_entries += dropped
+
+    def record(self, endpoint, status, seconds):
+        """
+        Count a request and remember its latency
+        """
+        with self.lock:
+            if status >= 500:
+                self.server_errors += 1
+            counts = self.requests.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+            self.latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(seconds * 1000)
+
+    def render(self, kind, name):
+        """
+        Return WAV bytes for a line or a syllable, raising ajpncvvc.RenderError if it cannot be rendered
+        """
+        self.check_sources()
+        if kind == 'line':
+            return self.renderer.render_line_wav(name)
+        return self.renderer.render_syllable_wav(name)
+
+    def metrics(self):
+        """
+        Return cache statistics, request counts and latency percentiles
+        """
+        with self.lock:
+            latency = {}
+            for endpoint, values in self.latencies.items():
+                latency[endpoint] = {
+                    'count': len(values),
+                    'mean_ms': sum(values) / len(values),
+                    'p50_ms': percentile(values, 0.5),
+                    'p95_ms': percentile(values, 0.95),
+                    'max_ms': max(values),
+                }
+            return {
+                'uptime_seconds': time.time() - self.started,
+                'sources': {'consonant_path': self.source_paths[0], 'vowel_path': self.source_paths[1]},
+                'source_refreshes': self.refreshes,
+                'stale_entries_dropped': self.dropped_entries,
+                'asset_cache': ajpncvvc.asset_cache_stats(),
+                'syllable_cache': ajpncvvc.syllable_cache_stats(),
+                'requests': {endpoint: dict(counts) for endpoint, counts in self.requests.items()},
+                'server_errors': self.server_errors,
+                'latency': latency,
+            }
+
+def make_handler(service):
+    """
+    Create the request handler class serving one PreviewService
+    """
+    class PreviewHandler(BaseHTTPRequestHandler):
+        def send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, status, data):
+            self.send(status, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'), 'application/json')
+
+        def do_GET(self):
+            start = time.perf_counter()
+            parts = self.path.split('?', 1)[0].strip('/').split('/', 1)
+            endpoint = parts[0]
+            if endpoint == 'metrics' and len(parts) == 1:
+                self.send_json(200, service.metrics())
+                return
+            if endpoint not in ('line', 'syllable') or len(parts) != 2 or not parts[1]:
+                self.send_json(404, {'error': "use /line/<reclist line>, /syllable/<syllable> or /metrics"})
+                return
+
+            name = unquote(parts[1])
+            try:
+                body = service.render(endpoint, name)
+                status = 200
+            except ajpncvvc.RenderError as e:
+                body = None
+                status = 422
+                errors = e.errors
+            except Exception as e:
+                # Unexpected failures (unreadable sources, broken archives, ...) still get an answer
+                self.log_error("Rendering %s %s failed: %r", endpoint, name, e)
+                body = None
+                status = 500
+                errors = [f"{type(e).__name__}: {str(e)}"]
+            service.record(endpoint, status, time.perf_counter() - start)
+            if body is None:
+                self.send_json(status, {'error': f"Cannot render {endpoint} {name}", 'errors': errors})
+            else:
+                self.send(status, body, 'audio/wav')
+
+    return PreviewHandler
+
+def main(argv=None):
+    """
+    Start the preview server
+    """
+    parser = argparse.ArgumentParser(description="Serve rendered ajpncvvc.py lines and syllables over local HTTP")
+    parser.add_argument('--consonants', default=ajpncvvc.consonant_path, help="consonant folder or zip archive")
+    parser.add_argument('--vowels', default=ajpncvvc.vowel_path, help="vowel folder or zip archive")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default 8765)")
+    parser.add_argument('--warm', action='store_true', help="render the whole recording table once at startup")
+    args = parser.parse_args(argv)
+
+    service = PreviewService(args.consonants, args.vowels)
+    problems = service.renderer.check(ajpncvvc.recording_table)
+    for problem in problems:
+        print(f"Warning: {problem}")
+    if args.warm:
+        start = time.perf_counter()
+        for line in ajpncvvc.recording_table:
+            try:
+                service.renderer.render_line(line)
+            except ajpncvvc.RenderError:
+                pass
+        print(f"Warmed {len(ajpncvvc.recording_table)} lines in {time.perf_counter() - start:.2f}s")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Serving previews on http://{args.host}:{server.server_port}/line/ka_ki_ku (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
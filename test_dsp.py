@@ -0,0 +1,85 @@
+# Checks that the vectorized NumPy kernels of ajpncvvc.py match the pure Python
+# fades and crossfades within 1 LSB
+# Run with python -m pytest test_dsp.py (or python -m unittest test_dsp)
+
+import array
+import random
+import unittest
+import contextlib
+
+import ajpncvvc
+
+@contextlib.contextmanager
+def numpy_kernels(enabled):
+    """
+    Temporarily switch the NumPy kernels on or off
+    """
+    previous = ajpncvvc.use_numpy
+    ajpncvvc.use_numpy = enabled
+    try:
+        yield
+    finally:
+        ajpncvvc.use_numpy = previous
+
+def random_audio(rng, length, peak=32767):
+    """
+    Return length random int16 samples within +-peak
+    """
+    return array.array('h', (rng.randint(-peak, peak) for _ in range(length)))
+
+@unittest.skipIf(ajpncvvc.np is None, "NumPy is not installed")
+class VectorizedKernelTest(unittest.TestCase):
+    # Buffer lengths including the short ones where the crossfade length is clamped
+    LENGTHS = [1, 2, 5, 9, 10, 11, 19, 20, 21, 100, 1000, 4410]
+
+    def assert_within_one_lsb(self, function, *args):
+        with numpy_kernels(False):
+            expected = function(*args)
+        with numpy_kernels(True):
+            actual = function(*args)
+        self.assertEqual(len(actual), len(expected))
+        if len(expected):
+            self.assertLessEqual(max(abs(a - b) for a, b in zip(actual, expected)), 1)
+
+    def test_cosine_fadeout(self):
+        rng = random.Random(2)
+        for length in self.LENGTHS:
+            for fade_fraction in (0.0, 0.05, 0.3, 1.0):
+                with self.subTest(length=length, fade_fraction=fade_fraction):
+                    self.assert_within_one_lsb(ajpncvvc.apply_cosine_fadeout, random_audio(rng, length), fade_fraction)
+
+    def test_cosine_crossfade_segments(self):
+        rng = random.Random(3)
+        for length1 in self.LENGTHS:
+            for length2 in (1, 10, 50, 3000):
+                with self.subTest(length1=length1, length2=length2):
+                    self.assert_within_one_lsb(ajpncvvc.cosine_crossfade_segments, random_audio(rng, length1),
+                                               random_audio(rng, length2), 0.05)
+
+    def test_concatenate_audio(self):
+        rng = random.Random(4)
+        for consonant_length in self.LENGTHS:
+            for vowel_length in (1, 10, 200, 4410):
+                with self.subTest(consonant_length=consonant_length, vowel_length=vowel_length):
+                    self.assert_within_one_lsb(ajpncvvc.concatenate_audio, random_audio(rng, consonant_length),
+                                               random_audio(rng, vowel_length), None)
+
+    def test_empty_buffers(self):
+        empty = array.array('h')
+        self.assert_within_one_lsb(ajpncvvc.apply_cosine_fadeout, empty, 0.3)
+        self.assert_within_one_lsb(ajpncvvc.cosine_crossfade_segments, empty, random_audio(random.Random(5), 20))
+        self.assert_within_one_lsb(ajpncvvc.cosine_crossfade_segments, random_audio(random.Random(6), 20), empty)
+
+    def test_crossfade_clipping(self):
+        # Full-scale samples of the same sign add up past int16 in the middle of the crossfade
+        for value in (32767, -32768):
+            loud = array.array('h', [value] * 1000)
+            with self.subTest(value=value):
+                self.assert_within_one_lsb(ajpncvvc.cosine_crossfade_segments, loud, loud, 0.5)
+                self.assert_within_one_lsb(ajpncvvc.concatenate_audio, loud, loud, None)
+                with numpy_kernels(True):
+                    mixed = ajpncvvc.cosine_crossfade_segments(loud, loud, 0.5)
+                self.assertEqual(max(abs(sample) for sample in mixed), abs(value))
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file